@@ -0,0 +1,104 @@
+"""
+本地上游替身 - 用 aiohttp 在本机模拟 EVocalRank latest.json 接口与封面 CDN，可注入延迟与失败
+"""
+import asyncio
+import hashlib
+import json
+import random
+from pathlib import Path
+from typing import Optional
+
+from aiohttp import web
+
+from fixtures import latest_issue, make_cover
+
+
+class FakeUpstream:
+    """本地 EVocalRank / 封面 CDN 替身
+
+    - /data/info/latest.json：返回当前期，支持 ETag 条件请求
+    - /covers/{name}：返回合成封面
+    """
+
+    def __init__(
+        self,
+        ranknum: int,
+        api_latency: float = 0.0,
+        cover_latency: float = 0.0,
+        failure_rate: float = 0.0,
+        fixture: Optional[Path] = None,
+        seed: int = 0,
+    ):
+        self.ranknum = ranknum
+        self.api_latency = api_latency
+        self.cover_latency = cover_latency
+        self.failure_rate = failure_rate
+        self.fixture = fixture
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._cover = make_cover(seed=seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.port = 0
+        self.api_requests = 0
+        self.cover_requests = 0
+        self.failures = 0
+        self._payload = b""
+        self._etag = ""
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/data/info/latest.json"
+
+    def issue(self, ranknum: int) -> dict:
+        """生成指定期的数据，封面指向本地 CDN"""
+        return latest_issue(self.fixture, ranknum, f"{self.base_url}/covers", self.seed)
+
+    def publish(self, ranknum: int) -> None:
+        """切换接口返回的当前期"""
+        self.ranknum = ranknum
+        self._payload = json.dumps(self.issue(ranknum), ensure_ascii=False).encode("utf-8")
+        self._etag = f'"{hashlib.md5(self._payload).hexdigest()}"'
+
+    def _should_fail(self) -> bool:
+        if self.failure_rate > 0 and self._rng.random() < self.failure_rate:
+            self.failures += 1
+            return True
+        return False
+
+    async def _handle_latest(self, request: web.Request) -> web.Response:
+        self.api_requests += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        if self._should_fail():
+            return web.Response(status=503)
+        if request.headers.get("If-None-Match") == self._etag:
+            return web.Response(status=304, headers={"ETag": self._etag})
+        return web.Response(body=self._payload, content_type="application/json", headers={"ETag": self._etag})
+
+    async def _handle_cover(self, request: web.Request) -> web.Response:
+        self.cover_requests += 1
+        if self.cover_latency:
+            await asyncio.sleep(self.cover_latency)
+        if self._should_fail():
+            return web.Response(status=503)
+        return web.Response(body=self._cover, content_type="image/jpeg")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/data/info/latest.json", self._handle_latest)
+        app.router.add_get("/covers/{name}", self._handle_cover)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.publish(self.ranknum)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,137 @@
+"""
+基准测试数据 - 生成与 EVocalRank latest.json 结构一致的合成周榜数据和封面图片
+"""
+import io
+import json
+import random
+import time
+from pathlib import Path
+from typing import Optional
+
+# 与插件 VIDEO_LIST_FIELDS 一致
+LIST_FIELDS = (
+    "main_rank", "second_rank", "super_hit", "pick_up",
+    "oth_pickup", "Vocaloid_pick_up", "history-1-year",
+    "history-10-year", "ed", "op",
+)
+
+STAT_FIELDS = (
+    "total_collect_count", "new_video_count", "new_in_rank_count", "new_in_mainrank_count",
+    "pick_up_count", "oth_pick_up_count", "new_vc_in_rank_count", "new_vc_in_mainrank_count",
+    "vc_in_rank_count", "vc_in_mainrank_count", "new_sv_in_rank_count", "new_sv_in_mainrank_count",
+    "sv_in_rank_count", "sv_in_mainrank_count", "new_ace_in_rank_count", "new_ace_in_mainrank_count",
+    "ace_in_rank_count", "ace_in_mainrank_count",
+)
+
+WEEK = 7 * 24 * 60 * 60
+
+TITLE_WORDS = ("初音ミク", "鏡音リン", "巡音ルカ", "洛天依", "乐正绫", "言和", "GUMI", "可不", "重音テト", "オリジナル")
+
+
+def make_video(rng: random.Random, avid: int, rank, cover_base: str) -> dict:
+    """生成一个视频条目"""
+    metrics = {
+        "point": rng.randint(10_000, 2_000_000),
+        "play": rng.randint(10_000, 5_000_000),
+        "coin": rng.randint(100, 200_000),
+        "comment": rng.randint(10, 20_000),
+        "danmaku": rng.randint(10, 50_000),
+        "favorite": rng.randint(100, 300_000),
+        "like": rng.randint(100, 500_000),
+        "share": rng.randint(10, 20_000),
+    }
+    return {
+        **metrics,
+        "url": f"https://www.bilibili.com/video/av{avid}",
+        "avid": str(avid),
+        "coverurl": f"{cover_base}/{avid}.jpg",
+        "title": f"【{rng.choice(TITLE_WORDS)}】合成测试曲 No.{avid} feat. {rng.choice(TITLE_WORDS)}",
+        "pubdate": "2024-01-01 00:00:00",
+        "referSource": {key: value // 2 for key, value in metrics.items()},
+        "rank": rank,
+    }
+
+
+def make_issue(ranknum: int, cover_base: str, list_size: int = 30, seed: int = 0) -> dict:
+    """生成一期合成周榜数据
+
+    相邻期之间约一半视频重复出现，使跨期索引与封面引用计数的行为接近真实数据
+    """
+    rng = random.Random(seed * 100_003 + ranknum)
+    generate_ts = 1_700_000_000 + ranknum * WEEK
+    data = {
+        "version": 1.0,
+        "ranknum": ranknum,
+        "url": f"https://www.evocalrank.com/rank/{ranknum}",
+        "coverurl": f"{cover_base}/issue_{ranknum}.jpg",
+        "pubdate": time.strftime("%Y-%m-%d", time.gmtime(generate_ts)),
+        "generate_time": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(generate_ts)),
+        "generate_timestamp": generate_ts,
+        "collect_start_time": "",
+        "collect_end_time": "",
+        "collect_start_time_timestamp": generate_ts - WEEK,
+        "collect_end_time_timestamp": generate_ts - 3600,
+        "thanks_list": [],
+        "statistic": {
+            **{key: rng.randint(0, 5000) for key in STAT_FIELDS},
+            "diff": {key: rng.randint(-500, 500) for key in ("total_play",) + STAT_FIELDS
+                     if key not in ("total_collect_count", "pick_up_count", "oth_pick_up_count")},
+        },
+    }
+    for list_idx, field in enumerate(LIST_FIELDS):
+        videos = []
+        for idx in range(1, list_size + 1):
+            # 一半视频 ID 跨期稳定，另一半每期不同
+            if idx % 2:
+                avid = 1_000_000 + list_idx * 1000 + idx
+            else:
+                avid = ranknum * 100_000 + list_idx * 1000 + idx
+            rank = "SuperHit" if field == "super_hit" else idx
+            video = make_video(rng, avid, rank, cover_base)
+            if field == "super_hit":
+                video["superHit_times"] = rng.randint(1, 30)
+            videos.append(video)
+        data[field] = videos
+    return data
+
+
+def load_recorded_issue(path: Path, ranknum: int, cover_base: str) -> dict:
+    """读取录制的 latest.json，改写期号与封面地址，使其可作为任意一期使用"""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    offset = ranknum - data["ranknum"]
+    data["ranknum"] = ranknum
+    data["generate_timestamp"] = data.get("generate_timestamp", 0) + offset * WEEK
+    for field in LIST_FIELDS:
+        for video in data.get(field) or []:
+            video["coverurl"] = f"{cover_base}/{video['avid']}.jpg"
+    return data
+
+
+def make_cover(width: int = 640, height: int = 400, seed: int = 0, fallback_kb: int = 60) -> bytes:
+    """生成一张合成封面；有 Pillow 时为真实 JPEG，否则为指定大小的随机字节"""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return random.Random(seed).randbytes(fallback_kb * 1024)
+
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width, height))
+    draw = ImageDraw.Draw(img)
+    base = [rng.randint(0, 255) for _ in range(3)]
+    for y in range(height):
+        shade = tuple((c + y * 255 // height) % 256 for c in base)
+        draw.line((0, y, width, y), fill=shade)
+    for _ in range(40):
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        r = rng.randint(10, 80)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def latest_issue(path: Optional[Path], ranknum: int, cover_base: str, seed: int) -> dict:
+    """按是否提供录制数据选择数据来源"""
+    if path is not None:
+        return load_recorded_issue(path, ranknum, cover_base)
+    return make_issue(ranknum, cover_base, seed=seed)
@@ -0,0 +1,148 @@
+"""
+基准测试脚手架 - 在没有 AstrBot 运行时的环境中加载插件，并提供模拟的消息事件
+
+已安装 AstrBot 时直接使用真实的 astrbot.api；否则注入只包含插件用到的接口的最小替身
+"""
+import importlib
+import logging
+import sys
+import time
+import types
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, List, Tuple
+
+PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+PLUGIN_PACKAGE = "vocaloid_plugin"
+
+
+def _identity_decorator(*args, **kwargs):
+    def decorator(func):
+        return func
+    return decorator
+
+
+def install_astrbot_stubs() -> bool:
+    """未安装 AstrBot 时注入最小替身，返回是否使用了替身"""
+    try:
+        importlib.import_module("astrbot.api")
+        return False
+    except ImportError:
+        pass
+
+    astrbot = types.ModuleType("astrbot")
+    api = types.ModuleType("astrbot.api")
+    event = types.ModuleType("astrbot.api.event")
+    event_filter = types.ModuleType("astrbot.api.event.filter")
+    star = types.ModuleType("astrbot.api.star")
+    components = types.ModuleType("astrbot.api.message_components")
+
+    logger = logging.getLogger("vocaloid_bench")
+    api.logger = logger
+    api.AstrBotConfig = dict
+
+    event_filter.PlatformAdapterType = SimpleNamespace(AIOCQHTTP="aiocqhttp", QQOFFICIAL="qq_official", ALL="all")
+    event_filter.PermissionType = SimpleNamespace(ADMIN="admin", MEMBER="member")
+    event_filter.command = _identity_decorator
+    event_filter.permission_type = _identity_decorator
+    event.filter = event_filter
+    event.AstrMessageEvent = object
+
+    class Star:
+        def __init__(self, context: Any = None):
+            self.context = context
+
+    star.Star = Star
+    star.Context = object
+    star.register = _identity_decorator
+
+    class Plain:
+        def __init__(self, text: str):
+            self.text = text
+
+    class Image:
+        def __init__(self, file: str):
+            self.file = file
+
+        @classmethod
+        def fromFileSystem(cls, path: str) -> "Image":
+            return cls(path)
+
+        @classmethod
+        def fromURL(cls, url: str) -> "Image":
+            return cls(url)
+
+    class Node:
+        def __init__(self, uin: int = 0, name: str = "", content: List = None):
+            self.uin = uin
+            self.name = name
+            self.content = content or []
+
+    class Nodes:
+        def __init__(self, nodes: List):
+            self.nodes = nodes
+
+    components.Plain = Plain
+    components.Image = Image
+    components.Node = Node
+    components.Nodes = Nodes
+
+    astrbot.api = api
+    api.event = event
+    api.star = star
+    api.message_components = components
+    sys.modules.update({
+        "astrbot": astrbot,
+        "astrbot.api": api,
+        "astrbot.api.event": event,
+        "astrbot.api.event.filter": event_filter,
+        "astrbot.api.star": star,
+        "astrbot.api.message_components": components,
+    })
+    return True
+
+
+def load_plugin() -> types.ModuleType:
+    """以包的形式导入插件（插件目录本身没有 __init__.py，由 AstrBot 按包加载）"""
+    if PLUGIN_PACKAGE not in sys.modules:
+        package = types.ModuleType(PLUGIN_PACKAGE)
+        package.__path__ = [str(PLUGIN_ROOT)]
+        sys.modules[PLUGIN_PACKAGE] = package
+    return importlib.import_module(f"{PLUGIN_PACKAGE}.main")
+
+
+def plugin_module(name: str) -> types.ModuleType:
+    """获取插件的子模块，如 "src.api" """
+    return importlib.import_module(f"{PLUGIN_PACKAGE}.{name}")
+
+
+class FakeEvent:
+    """模拟的消息事件，只实现插件用到的属性与方法"""
+
+    def __init__(self, platform: str = "aiocqhttp", session: str = "bench:group:1", message: str = ""):
+        self.platform = platform
+        self.unified_msg_origin = f"{platform}:{session}"
+        self.message_str = message
+        self.message_obj = SimpleNamespace(self_id="10000")
+
+    def get_platform_name(self) -> str:
+        return self.platform
+
+    def plain_result(self, text: str) -> Tuple[str, Any]:
+        return ("plain", text)
+
+    def chain_result(self, chain: List) -> Tuple[str, Any]:
+        return ("chain", chain)
+
+
+async def drive(results: AsyncIterator) -> Tuple[float, float, int]:
+    """消费命令处理器产生的全部消息，返回 (首条消息耗时, 总耗时, 消息条数)"""
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async for _ in results:
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    total = time.perf_counter() - start
+    return (first if first is not None else total), total, count
@@ -0,0 +1,298 @@
+"""
+插件性能基准测试
+
+在本地启动 EVocalRank / 封面 CDN 替身，测量：
+- 启动：N 期本地缓存下的加载、索引构建与解析耗时
+- 回复：冷启动（无封面缓存）与热缓存下的回复耗时，合并转发与多条消息两种平台
+- 负载：并发请求下的每秒命令数与耗时分布
+- 封面缓存命中率、上游请求数
+
+结果以 JSON 输出，便于在版本之间对比
+
+用法: python benchmarks/run.py [--issues 30] [--concurrency 16] [--requests 400] [--output result.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from fake_upstream import FakeUpstream
+from harness import FakeEvent, drive, install_astrbot_stubs, load_plugin, plugin_module
+
+COMMANDS = ("cmd_main_rank", "cmd_second_rank", "cmd_pickup_rank")
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """耗时样本（秒）汇总为毫秒统计"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pick(0.5) * 1000,
+        "p95_ms": pick(0.95) * 1000,
+        "p99_ms": pick(0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+class Bench:
+    """在临时目录中运行各项基准，每项使用独立的插件实例与缓存目录"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.main = load_plugin()
+        self.api_module = plugin_module("src.api")
+        self.metrics = plugin_module("src.metrics").metrics
+        self.upstream = None
+
+    def make_config(self, **overrides) -> dict:
+        config = {
+            "cover_deadline": self.args.cover_deadline,
+            # 基准测试只关心插件自身的开销，放开会话级限速
+            "send_rate": 1000.0,
+            "send_burst": 1000,
+        }
+        config.update(overrides)
+        return config
+
+    async def new_plugin(self, workdir: Path, **config):
+        """在 workdir 下创建插件实例（插件缓存目录相对于工作目录），不启动定时任务"""
+        os.chdir(workdir)
+        self.api_module.RANK_API_URL = self.upstream.api_url
+        plugin = self.main.VocaloidRankPlugin(None, self.make_config(**config))
+        await plugin._http_client.start()
+        return plugin
+
+    async def close_plugin(self, plugin) -> None:
+        await plugin._message_builder.close()
+        await plugin._cache_manager.close()
+        plugin._thumbnails.close()
+        plugin._board_renderer.close()
+        await plugin._http_client.close()
+
+    # ==================== 启动 ====================
+
+    async def bench_startup(self, workdir: Path) -> dict:
+        latest = self.args.ranknum
+        issues = [self.upstream.issue(n) for n in range(latest - self.args.issues + 1, latest + 1)]
+
+        plugin = await self.new_plugin(workdir)
+        for data in issues:
+            await plugin._cache_manager.save_cache(data)
+        await self.close_plugin(plugin)
+
+        start = time.perf_counter()
+        plugin = await self.new_plugin(workdir)
+        constructed = time.perf_counter() - start
+        snapshot = await plugin._api_client.load_from_cache()
+        loaded = time.perf_counter() - start
+        await plugin._cache_manager.get_history_index()
+        indexed = time.perf_counter() - start
+
+        load_samples = []
+        for _ in range(self.args.repeat):
+            t = time.perf_counter()
+            await plugin._cache_manager.load_cache(latest)
+            load_samples.append(time.perf_counter() - t)
+        archived = latest - self.args.issues + 1
+        t = time.perf_counter()
+        await plugin._cache_manager.load_cache(archived)
+        archive_read = time.perf_counter() - t
+        await self.close_plugin(plugin)
+
+        types_module = plugin_module("src.types")
+        payload = json.dumps(issues[-1], ensure_ascii=False)
+        parse_samples, snapshot_samples = [], []
+        for _ in range(self.args.repeat):
+            t = time.perf_counter()
+            raw = json.loads(payload)
+            parse_samples.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            types_module.RankSnapshot.from_dict(raw)
+            snapshot_samples.append(time.perf_counter() - t)
+
+        return {
+            "issues": self.args.issues,
+            "loaded_ranknum": snapshot.ranknum if snapshot else None,
+            "construct_ms": constructed * 1000,
+            "load_latest_ms": loaded * 1000,
+            "build_indexes_ms": indexed * 1000,
+            "load_cache": summarize(load_samples),
+            "archive_read_ms": archive_read * 1000,
+            "payload_bytes": len(payload.encode("utf-8")),
+            "json_parse": summarize(parse_samples),
+            "snapshot_from_dict": summarize(snapshot_samples),
+        }
+
+    # ==================== 回复 ====================
+
+    async def bench_reply(self, workdir: Path, platform_name: str) -> dict:
+        plugin = await self.new_plugin(workdir)
+        handler = getattr(plugin, COMMANDS[0])
+
+        cold_first, cold_total, cold_count = await drive(handler(FakeEvent(platform_name, "cold")))
+        warm_first, warm_total = [], []
+        for idx in range(self.args.repeat):
+            first, total, _ = await drive(handler(FakeEvent(platform_name, f"warm{idx}")))
+            warm_first.append(first)
+            warm_total.append(total)
+        await self.close_plugin(plugin)
+        return {
+            "platform": platform_name,
+            "messages": cold_count,
+            "cold_first_message_ms": cold_first * 1000,
+            "cold_total_ms": cold_total * 1000,
+            "warm_first_message": summarize(warm_first),
+            "warm_total": summarize(warm_total),
+        }
+
+    # ==================== 并发负载 ====================
+
+    async def bench_load(self, workdir: Path) -> dict:
+        plugin = await self.new_plugin(workdir)
+        # 预热：三个榜单各请求一次
+        for name in COMMANDS:
+            await drive(getattr(plugin, name)(FakeEvent("aiocqhttp", "warmup")))
+
+        rng = random.Random(self.args.seed)
+        plan = [rng.choice(COMMANDS) for _ in range(self.args.requests)]
+        queue: asyncio.Queue = asyncio.Queue()
+        for idx, name in enumerate(plan):
+            queue.put_nowait((idx, name))
+        samples: List[float] = []
+
+        async def worker(worker_id: int) -> None:
+            while True:
+                try:
+                    idx, name = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                _, total, _ = await drive(getattr(plugin, name)(FakeEvent("aiocqhttp", f"user{idx}")))
+                samples.append(total)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(self.args.concurrency)))
+        elapsed = time.perf_counter() - start
+        await self.close_plugin(plugin)
+        return {
+            "concurrency": self.args.concurrency,
+            "requests": len(plan),
+            "elapsed_s": elapsed,
+            "commands_per_sec": len(plan) / elapsed if elapsed else 0.0,
+            "latency": summarize(samples),
+        }
+
+    # ==================== 汇总 ====================
+
+    async def run(self) -> dict:
+        self.upstream = FakeUpstream(
+            self.args.ranknum,
+            api_latency=self.args.api_latency_ms / 1000,
+            cover_latency=self.args.cover_latency_ms / 1000,
+            failure_rate=self.args.failure_rate,
+            fixture=Path(self.args.fixture).resolve() if self.args.fixture else None,
+            seed=self.args.seed,
+        )
+        await self.upstream.start()
+        cwd = os.getcwd()
+        results: Dict[str, dict] = {}
+        try:
+            with tempfile.TemporaryDirectory(prefix="vocaloid_bench_") as tmp:
+                tmp_path = Path(tmp)
+                for name in ("startup", "reply_forward", "reply_messages", "load"):
+                    (tmp_path / name).mkdir()
+                try:
+                    self.metrics.reset()
+                    results["startup"] = await self.bench_startup(tmp_path / "startup")
+                    self.metrics.reset()
+                    results["reply_forward"] = await self.bench_reply(tmp_path / "reply_forward", "aiocqhttp")
+                    # 未单独配置限制的平台，不受平台级令牌桶影响
+                    results["reply_messages"] = await self.bench_reply(tmp_path / "reply_messages", "webchat")
+                    results["load"] = await self.bench_load(tmp_path / "load")
+                    results["caches"] = {
+                        "cover_hit_ratio": self.metrics.ratio("cover_cache_hits_total", "cover_cache_misses_total"),
+                        "render_hit_ratio": self.metrics.ratio("render_cache_hits_total", "render_cache_misses_total"),
+                        "cover_bytes_downloaded": self.metrics.counter("cover_bytes_downloaded_total"),
+                        "cover_download_failures": self.metrics.counter("cover_download_failures_total"),
+                        "api_fallbacks": self.metrics.counter("api_fallbacks_total"),
+                    }
+                finally:
+                    # 离开临时目录后才能删除它
+                    os.chdir(cwd)
+        finally:
+            await self.upstream.stop()
+
+        results["upstream"] = {
+            "api_requests": self.upstream.api_requests,
+            "cover_requests": self.upstream.cover_requests,
+            "injected_failures": self.upstream.failures,
+        }
+        return results
+
+
+def environment(stubbed: bool) -> dict:
+    """记录运行环境，便于比较不同机器或版本的结果"""
+    def has(module: str) -> bool:
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            return False
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "astrbot_stubbed": stubbed,
+        "orjson": has("orjson"),
+        "pillow": has("PIL"),
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Vocaloid 周刊插件基准测试")
+    parser.add_argument("--issues", type=int, default=30, help="启动基准中预先缓存的期数")
+    parser.add_argument("--ranknum", type=int, default=700, help="最新一期的期号")
+    parser.add_argument("--repeat", type=int, default=20, help="热路径重复测量次数")
+    parser.add_argument("--concurrency", type=int, default=16, help="负载基准的并发数")
+    parser.add_argument("--requests", type=int, default=400, help="负载基准的命令总数")
+    parser.add_argument("--api-latency-ms", type=float, default=50, help="接口注入延迟（毫秒）")
+    parser.add_argument("--cover-latency-ms", type=float, default=30, help="封面注入延迟（毫秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="上游请求失败比例（0-1）")
+    parser.add_argument("--cover-deadline", type=float, default=8, help="插件等待封面的总时限（秒）")
+    parser.add_argument("--fixture", help="录制的 latest.json 路径，不指定时使用合成数据")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", help="结果 JSON 输出路径，不指定时输出到标准输出")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    stubbed = install_astrbot_stubs()
+    started = time.time()
+    results = asyncio.run(Bench(args).run())
+    report = {
+        "timestamp": int(started),
+        "duration_s": time.time() - started,
+        "environment": environment(stubbed),
+        "params": vars(args),
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,56 @@
 Vocaloid 周刊排行榜查询插件
 支持查询主榜、副榜、PickUp 榜
 """
+import asyncio
+from pathlib import Path
+from typing import Optional
+
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star, register
-from astrbot.api import logger
+from astrbot.api import logger, AstrBotConfig
 
-from .src import CacheManager, RankAPIClient, MessageBuilder, SchedulerTask
+from .src import (
+    CacheManager,
+    RankAPIClient,
+    MessageBuilder,
+    SchedulerTask,
+    SendScheduler,
+    HttpClient,
+    ThumbnailPipeline,
+    BoardRenderer,
+    CircuitBreaker,
+    LeaderLease,
+    RankSnapshot,
+    normalize_avid,
+    VIDEO_LIST_TITLES,
+    metrics,
+    METRICS_DUMP_INTERVAL,
+    DEFAULT_SNAPSHOT_TTL,
+    DEFAULT_HTTP_CONNECTION_LIMIT,
+    DEFAULT_HTTP_LIMIT_PER_HOST,
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_API_TIMEOUT,
+    DEFAULT_COVER_TIMEOUT,
+    DEFAULT_COVER_CONCURRENCY,
+    DEFAULT_COVER_DEADLINE,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_COVER_CACHE_MAX_MB,
+    DEFAULT_THUMBNAIL_MAX_EDGE,
+    DEFAULT_THUMBNAIL_QUALITY,
+    DEFAULT_THUMBNAIL_FORMAT,
+    DEFAULT_THUMBNAIL_WORKERS,
+    DEFAULT_OUTPUT_MODE,
+    DEFAULT_STALE_GRACE,
+    DEFAULT_BREAKER_FAILURE_THRESHOLD,
+    DEFAULT_BREAKER_BASE_COOLDOWN,
+    DEFAULT_BREAKER_MAX_COOLDOWN,
+    DEFAULT_LEADER_LEASE_TTL,
+    DEFAULT_CACHE_SYNC_INTERVAL,
+    DEFAULT_ARCHIVE_MAX_ISSUES,
+    MAX_CACHE_COUNT,
+)
 
 
 @register(
@@ -19,70 +64,299 @@ from .src import CacheManager, RankAPIClient, MessageBuilder, SchedulerTask
 class VocaloidRankPlugin(Star):
     """Vocaloid 周刊排行榜插件"""
 
-    def __init__(self, context: Context):
+    def __init__(self, context: Context, config: AstrBotConfig):
         super().__init__(context)
-        
+        self.config = config
+
         # 初始化各模块
-        self._cache_manager = CacheManager()
-        self._api_client = RankAPIClient(self._cache_manager)
-        self._message_builder = MessageBuilder(self._cache_manager)
-        self._scheduler = SchedulerTask(self._api_client.fetch_rank_data)
+        self._http_client = HttpClient(
+            limit=self.config.get("http_connection_limit", DEFAULT_HTTP_CONNECTION_LIMIT),
+            limit_per_host=self.config.get("http_limit_per_host", DEFAULT_HTTP_LIMIT_PER_HOST),
+            dns_cache_ttl=self.config.get("dns_cache_ttl", DEFAULT_DNS_CACHE_TTL),
+            keepalive_timeout=self.config.get("keepalive_timeout", DEFAULT_KEEPALIVE_TIMEOUT),
+            api_timeout=self.config.get("api_timeout", DEFAULT_API_TIMEOUT),
+            cover_timeout=self.config.get("cover_timeout", DEFAULT_COVER_TIMEOUT),
+        )
+        self._thumbnails = ThumbnailPipeline(
+            enabled=self.config.get("cover_thumbnail", True),
+            max_edge=self.config.get("thumbnail_max_edge", DEFAULT_THUMBNAIL_MAX_EDGE),
+            quality=self.config.get("thumbnail_quality", DEFAULT_THUMBNAIL_QUALITY),
+            fmt=self.config.get("thumbnail_format", DEFAULT_THUMBNAIL_FORMAT),
+            workers=DEFAULT_THUMBNAIL_WORKERS,
+        )
+        breaker_options = dict(
+            failure_threshold=self.config.get("breaker_failure_threshold", DEFAULT_BREAKER_FAILURE_THRESHOLD),
+            base_cooldown=self.config.get("breaker_base_cooldown", DEFAULT_BREAKER_BASE_COOLDOWN),
+            max_cooldown=self.config.get("breaker_max_cooldown", DEFAULT_BREAKER_MAX_COOLDOWN),
+        )
+        self._cache_manager = CacheManager(
+            self._http_client,
+            cover_concurrency=self.config.get("cover_concurrency", DEFAULT_COVER_CONCURRENCY),
+            cover_deadline=self.config.get("cover_deadline", DEFAULT_COVER_DEADLINE),
+            cover_cache_max_mb=self.config.get("cover_cache_max_mb", DEFAULT_COVER_CACHE_MAX_MB),
+            hot_issue_count=self.config.get("hot_issue_count", MAX_CACHE_COUNT),
+            archive_max_issues=self.config.get("archive_max_issues", DEFAULT_ARCHIVE_MAX_ISSUES),
+            thumbnails=self._thumbnails,
+            cover_breaker=CircuitBreaker("cover", **breaker_options),
+        )
+        self._leader = LeaderLease(
+            self._cache_manager.get_cache_dir() / "leader.json",
+            ttl=self.config.get("leader_lease_ttl", DEFAULT_LEADER_LEASE_TTL),
+        )
+        self._api_client = RankAPIClient(
+            self._cache_manager,
+            self._http_client,
+            snapshot_ttl=self.config.get("snapshot_ttl", DEFAULT_SNAPSHOT_TTL),
+            stale_grace=self.config.get("stale_grace", DEFAULT_STALE_GRACE),
+            breaker=CircuitBreaker("api", **breaker_options),
+            leader=self._leader,
+        )
+        self._send_scheduler = SendScheduler(
+            rate=self.config.get("send_rate", 0),
+            burst=self.config.get("send_burst", 0),
+            batch_size=self.config.get("send_batch_size", 0),
+        )
+        self._board_renderer = BoardRenderer(font_path=self.config.get("board_font_path", ""))
+        self._message_builder = MessageBuilder(
+            self._cache_manager,
+            self._send_scheduler,
+            board_renderer=self._board_renderer,
+            output_mode=self.config.get("output_mode", DEFAULT_OUTPUT_MODE),
+        )
+        self._scheduler = SchedulerTask(
+            self._api_client.fetch_rank_data,
+            lambda: self._api_client.cached_data,
+            on_new_issue=self._message_builder.warmup,
+            poll_interval=self.config.get("poll_interval", DEFAULT_POLL_INTERVAL),
+            max_poll_interval=self.config.get("max_poll_interval", DEFAULT_MAX_POLL_INTERVAL),
+        )
+        self._metrics_task: Optional[asyncio.Task] = None
+        self._ready_task: Optional[asyncio.Task] = None
+        self._coordination_task: Optional[asyncio.Task] = None
+        self._verify_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
-        """插件初始化，启动定时更新任务"""
+        """插件初始化，本地缓存在后台加载，不阻塞 AstrBot 启动"""
         logger.info("Vocaloid 周刊插件初始化中...")
 
-        # 预加载本地缓存
-        cached_data = self._api_client.load_from_cache()
-        if cached_data:
-            logger.info(f"已加载本地缓存，第 {cached_data.ranknum} 期")
+        # 创建共享 HTTP 连接池
+        await self._http_client.start()
+
+        # 加载本地缓存并启动定时更新任务，加载完成前到达的命令会等待其完成
+        self._ready_task = asyncio.create_task(self._hydrate())
 
-        # 启动定时更新任务
-        self._scheduler.start()
+        # 按配置定期导出 Prometheus 文本格式的指标
+        dump_path = self.config.get("metrics_dump_path", "")
+        if dump_path:
+            self._metrics_task = asyncio.create_task(self._dump_metrics_loop(Path(dump_path)))
+
+    async def _hydrate(self):
+        """后台加载缓存清单与最新一期，之后启动定时更新任务与封面缓存核对
+
+        本任务结束即视为就绪，封面核对在独立任务中进行，命令无需等待
+        """
+        try:
+            with metrics.timer("startup_hydrate_seconds"):
+                await self._cache_manager.hydrate()
+                cached_data = await self._api_client.load_from_cache()
+            if cached_data:
+                logger.info(f"已加载本地缓存，第 {cached_data.ranknum} 期")
+        except Exception as e:
+            # 缓存损坏不影响插件可用，命令会按需从接口获取数据
+            logger.error(f"加载本地缓存失败: {e}")
+
+        # 选举主实例，由主实例运行定时更新任务
+        self._coordination_task = asyncio.create_task(self._coordinate_loop())
+        if self.config.get("verify_cover_cache", True):
+            self._verify_task = asyncio.create_task(self._verify_covers())
         logger.info("Vocaloid 周刊插件初始化完成")
 
+    async def _verify_covers(self):
+        """核对封面索引与磁盘文件，移除已丢失的条目"""
+        try:
+            await self._cache_manager.verify_covers()
+        except Exception as e:
+            logger.warning(f"核对封面缓存失败: {e}")
+
+    async def _coordinate_loop(self):
+        """定期续约主实例租约：主实例运行定时更新与封面预热，其他实例读取主实例写入的缓存"""
+        interval = min(
+            self.config.get("cache_sync_interval", DEFAULT_CACHE_SYNC_INTERVAL),
+            self._leader.ttl / 3,
+        )
+        while True:
+            try:
+                if await self._renew_lease():
+                    self._scheduler.start()
+                else:
+                    await self._scheduler.stop()
+                    await self._api_client.sync_from_cache()
+            except Exception as e:
+                logger.warning(f"多实例同步失败: {e}")
+            await asyncio.sleep(interval)
+
+    async def _renew_lease(self) -> bool:
+        """在工作线程中续约；被取消时仍等待本次续约写完，之后释放租约才不会被覆盖"""
+        renewal = asyncio.ensure_future(asyncio.to_thread(self._leader.try_acquire))
+        try:
+            return await asyncio.shield(renewal)
+        except asyncio.CancelledError:
+            await asyncio.wait([renewal])
+            raise
+
+    async def _wait_ready(self):
+        """等待后台加载完成；已完成时立即返回"""
+        task = self._ready_task
+        if task is not None and not task.done():
+            # 命令被取消时不影响后台加载
+            await asyncio.shield(task)
+
     async def terminate(self):
-        """插件销毁，取消定时任务"""
+        """插件销毁，取消定时任务并关闭连接池"""
+        if self._ready_task is not None and not self._ready_task.done():
+            self._ready_task.cancel()
+            try:
+                await self._ready_task
+            except asyncio.CancelledError:
+                pass
+        self._ready_task = None
+        if self._coordination_task is not None:
+            # 等待进行中的续约写完，避免释放租约后又被写回
+            self._coordination_task.cancel()
+            try:
+                await self._coordination_task
+            except asyncio.CancelledError:
+                pass
+            self._coordination_task = None
+        if self._verify_task is not None and not self._verify_task.done():
+            self._verify_task.cancel()
+            try:
+                await self._verify_task
+            except asyncio.CancelledError:
+                pass
+        self._verify_task = None
         await self._scheduler.stop()
+        await asyncio.to_thread(self._leader.release)
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        await self._message_builder.close()
+        await self._cache_manager.close()
+        self._thumbnails.close()
+        self._board_renderer.close()
+        await self._http_client.close()
         logger.info("Vocaloid 周刊插件已卸载")
 
+    async def _dump_metrics_loop(self, path: Path):
+        """定期将指标写入文件"""
+        while True:
+            await metrics.dump_prometheus(path)
+            await asyncio.sleep(METRICS_DUMP_INTERVAL)
+
     # ==================== 命令处理 ====================
 
-    @filter.command("v周榜")
-    async def cmd_main_rank(self, event: AstrMessageEvent):
-        """获取 Vocaloid 周刊主榜 Top 10"""
-        data = await self._api_client.fetch_rank_data()
+    async def _get_issue(self, ranknum: int) -> Optional[RankSnapshot]:
+        """获取指定期号的数据，期号为 0 时返回最新一期"""
+        await self._wait_ready()
+        if not ranknum:
+            return await self._api_client.get_rank_data()
+        latest = self._api_client.cached_data
+        if latest is not None and latest.ranknum == ranknum:
+            return latest
+        return await self._cache_manager.load_cache(ranknum)
+
+    async def _send_rank(self, event: AstrMessageEvent, field: str, ranknum: int):
+        """发送指定期号某个榜单的 Top 10"""
+        data = await self._get_issue(ranknum)
 
         if not data:
-            yield event.plain_result("❌ 暂无周榜数据，请稍后再试")
+            if ranknum:
+                yield event.plain_result(f"❌ 未找到第 {ranknum} 期的缓存数据")
+            else:
+                yield event.plain_result("❌ 暂无周榜数据，请稍后再试")
             return
 
-        rank_name = f"主榜 (第{data.ranknum}期)"
-        async for result in self._message_builder.send_rank_result(event, data.main_rank, rank_name):
+        async for result in self._message_builder.send_rank_result(event, data, field):
+            yield result
+
+    @filter.command("v周榜")
+    async def cmd_main_rank(self, event: AstrMessageEvent, ranknum: int = 0):
+        """获取 Vocaloid 周刊主榜 Top 10，可指定期号"""
+        async for result in self._send_rank(event, "main_rank", ranknum):
             yield result
 
     @filter.command("v副榜")
-    async def cmd_second_rank(self, event: AstrMessageEvent):
-        """获取 Vocaloid 周刊副榜 Top 10"""
-        data = await self._api_client.fetch_rank_data()
+    async def cmd_second_rank(self, event: AstrMessageEvent, ranknum: int = 0):
+        """获取 Vocaloid 周刊副榜 Top 10，可指定期号"""
+        async for result in self._send_rank(event, "second_rank", ranknum):
+            yield result
+
+    @filter.command("pickup榜")
+    async def cmd_pickup_rank(self, event: AstrMessageEvent, ranknum: int = 0):
+        """获取 Vocaloid 周刊 PickUp 榜 Top 10，可指定期号"""
+        async for result in self._send_rank(event, "pick_up", ranknum):
+            yield result
 
+    @filter.command("v榜")
+    async def cmd_list(self, event: AstrMessageEvent, name: str = "", page: int = 1, ranknum: int = 0):
+        """分页查看任意列表，默认最新一期，如 /v榜 长红 2 或 /v榜 主榜 2 691"""
+        data = await self._get_issue(ranknum)
+        field = self._message_builder.resolve_list(name) if name else None
+        if field is None:
+            usage = self._message_builder.build_list_usage(data)
+            yield event.plain_result(f"❌ 未知的列表: {name}\n{usage}" if name else usage)
+            return
         if not data:
-            yield event.plain_result("❌ 暂无周榜数据，请稍后再试")
+            if ranknum:
+                yield event.plain_result(f"❌ 未找到第 {ranknum} 期的缓存数据")
+            else:
+                yield event.plain_result("❌ 暂无周榜数据，请稍后再试")
             return
 
-        rank_name = f"副榜 (第{data.ranknum}期)"
-        async for result in self._message_builder.send_rank_result(event, data.second_rank, rank_name):
+        title = VIDEO_LIST_TITLES.get(field, field)
+        pages = self._message_builder.page_count(data, field)
+        if not pages:
+            yield event.plain_result(f"❌ 第 {data.ranknum} 期没有{title}数据")
+            return
+        if not 1 <= page <= pages:
+            yield event.plain_result(f"❌ 页码超出范围，{title}共 {pages} 页")
+            return
+
+        async for result in self._message_builder.send_rank_result(event, data, field, page):
             yield result
 
-    @filter.command("pickup榜")
-    async def cmd_pickup_rank(self, event: AstrMessageEvent):
-        """获取 Vocaloid 周刊 PickUp 榜 Top 10"""
-        data = await self._api_client.fetch_rank_data()
+    @filter.command("v走势")
+    async def cmd_trajectory(self, event: AstrMessageEvent, avid: str):
+        """查询视频在已缓存各期中的排名走势与播放增长"""
+        await self._wait_ready()
+        history = await self._cache_manager.get_history_index()
+        yield event.plain_result(self._message_builder.build_trajectory_text(history, normalize_avid(avid)))
 
-        if not data:
-            yield event.plain_result("❌ 暂无周榜数据，请稍后再试")
+    @filter.command("v长红")
+    async def cmd_super_hit(self, event: AstrMessageEvent):
+        """查询已缓存各期中 SuperHit 次数最多的视频"""
+        await self._wait_ready()
+        history = await self._cache_manager.get_history_index()
+        yield event.plain_result(self._message_builder.build_super_hit_text(history))
+
+    @filter.command("v搜索")
+    async def cmd_search(self, event: AstrMessageEvent, keyword: str = ""):
+        """按标题搜索已缓存各期中的视频"""
+        # 关键词可能包含空格，取指令之后的全部文本
+        parts = event.message_str.strip().split(maxsplit=1)
+        keyword = parts[1].strip() if len(parts) > 1 else keyword
+        if not keyword:
+            yield event.plain_result("用法: /v搜索 <关键词>")
             return
 
-        rank_name = f"PickUp 榜 (第{data.ranknum}期)"
-        async for result in self._message_builder.send_rank_result(event, data.pick_up, rank_name):
-            yield result
+        await self._wait_ready()
+        history = await self._cache_manager.get_history_index()
+        search = await self._cache_manager.get_search_index()
+        avids = search.search(keyword)
+        yield event.plain_result(self._message_builder.build_search_text(history, keyword, avids))
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("v状态")
+    async def cmd_status(self, event: AstrMessageEvent):
+        """查看插件运行状态：请求、缓存命中率与各环节耗时（仅管理员）"""
+        yield event.plain_result(self._message_builder.build_status_text())
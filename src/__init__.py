@@ -2,23 +2,65 @@
 src 模块初始化
 导出所有公共类和常量
 """
-from .types import RankResponse, VideoItem, VideoMetrics, Statistic, StatisticDiff
+from .types import RankResponse, RankSnapshot, VideoItem, VideoCard, VideoMetrics, Statistic, StatisticDiff
 from .constants import (
     FORWARD_SUPPORTED_PLATFORMS,
     RANK_API_URL,
     MAX_CACHE_COUNT,
+    VIDEO_LIST_TITLES,
+    LIST_ALIASES,
+    LIST_PAGE_SIZE,
+    DEFAULT_ARCHIVE_MAX_ISSUES,
+    DEFAULT_SNAPSHOT_TTL,
+    DEFAULT_STALE_GRACE,
+    DEFAULT_BREAKER_FAILURE_THRESHOLD,
+    DEFAULT_BREAKER_BASE_COOLDOWN,
+    DEFAULT_BREAKER_MAX_COOLDOWN,
+    DEFAULT_LEADER_LEASE_TTL,
+    DEFAULT_CACHE_SYNC_INTERVAL,
+    DEFAULT_HTTP_CONNECTION_LIMIT,
+    DEFAULT_HTTP_LIMIT_PER_HOST,
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_API_TIMEOUT,
+    DEFAULT_COVER_TIMEOUT,
+    DEFAULT_COVER_CONCURRENCY,
+    DEFAULT_COVER_DEADLINE,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_COVER_CACHE_MAX_MB,
+    DEFAULT_THUMBNAIL_MAX_EDGE,
+    DEFAULT_THUMBNAIL_QUALITY,
+    DEFAULT_THUMBNAIL_FORMAT,
+    DEFAULT_THUMBNAIL_WORKERS,
     CACHE_DIR_NAME,
     COVER_CACHE_DIR_NAME,
+    BOARD_CACHE_DIR_NAME,
+    DEFAULT_OUTPUT_MODE,
+    METRICS_DUMP_INTERVAL,
 )
+from .metrics import metrics, Metrics, Histogram
+from .circuit_breaker import CircuitBreaker
+from .file_lock import FileLock
+from .leader import LeaderLease
+from .http_client import HttpClient
+from .archive import IssueArchive
+from .thumbnail import ThumbnailPipeline
+from .board import BoardRenderer
+from .history import IssueIndex, HistoryEntry, normalize_avid
+from .search import TitleSearchIndex
 from .cache import CacheManager
 from .api import RankAPIClient
+from .send_scheduler import SendScheduler, TokenBucket
 from .message import MessageBuilder
 from .scheduler import SchedulerTask
 
 __all__ = [
     # Types
     "RankResponse",
+    "RankSnapshot",
     "VideoItem",
+    "VideoCard",
     "VideoMetrics",
     "Statistic",
     "StatisticDiff",
@@ -26,11 +68,56 @@ __all__ = [
     "FORWARD_SUPPORTED_PLATFORMS",
     "RANK_API_URL",
     "MAX_CACHE_COUNT",
+    "VIDEO_LIST_TITLES",
+    "LIST_ALIASES",
+    "LIST_PAGE_SIZE",
+    "DEFAULT_ARCHIVE_MAX_ISSUES",
+    "DEFAULT_SNAPSHOT_TTL",
+    "DEFAULT_STALE_GRACE",
+    "DEFAULT_BREAKER_FAILURE_THRESHOLD",
+    "DEFAULT_BREAKER_BASE_COOLDOWN",
+    "DEFAULT_BREAKER_MAX_COOLDOWN",
+    "DEFAULT_LEADER_LEASE_TTL",
+    "DEFAULT_CACHE_SYNC_INTERVAL",
+    "DEFAULT_HTTP_CONNECTION_LIMIT",
+    "DEFAULT_HTTP_LIMIT_PER_HOST",
+    "DEFAULT_DNS_CACHE_TTL",
+    "DEFAULT_KEEPALIVE_TIMEOUT",
+    "DEFAULT_API_TIMEOUT",
+    "DEFAULT_COVER_TIMEOUT",
+    "DEFAULT_COVER_CONCURRENCY",
+    "DEFAULT_COVER_DEADLINE",
+    "DEFAULT_POLL_INTERVAL",
+    "DEFAULT_MAX_POLL_INTERVAL",
+    "DEFAULT_COVER_CACHE_MAX_MB",
+    "DEFAULT_THUMBNAIL_MAX_EDGE",
+    "DEFAULT_THUMBNAIL_QUALITY",
+    "DEFAULT_THUMBNAIL_FORMAT",
+    "DEFAULT_THUMBNAIL_WORKERS",
     "CACHE_DIR_NAME",
     "COVER_CACHE_DIR_NAME",
+    "BOARD_CACHE_DIR_NAME",
+    "DEFAULT_OUTPUT_MODE",
+    "METRICS_DUMP_INTERVAL",
     # Classes
+    "metrics",
+    "Metrics",
+    "Histogram",
+    "CircuitBreaker",
+    "FileLock",
+    "LeaderLease",
+    "HttpClient",
+    "IssueArchive",
+    "ThumbnailPipeline",
+    "BoardRenderer",
+    "IssueIndex",
+    "HistoryEntry",
+    "normalize_avid",
+    "TitleSearchIndex",
     "CacheManager",
     "RankAPIClient",
+    "SendScheduler",
+    "TokenBucket",
     "MessageBuilder",
     "SchedulerTask",
 ]
@@ -2,66 +2,250 @@
 API 客户端模块 - 处理周榜数据的网络请求
 """
 import asyncio
-from typing import Optional
+import time
+from typing import Optional, Tuple
 
 import aiohttp
 
 from astrbot.api import logger
 
-from .constants import RANK_API_URL
-from .types import RankResponse
+from .constants import RANK_API_URL, DEFAULT_SNAPSHOT_TTL, DEFAULT_STALE_GRACE
+from .types import RankSnapshot
 from .cache import CacheManager
+from .http_client import HttpClient
+from .singleflight import SingleFlight
+from .circuit_breaker import CircuitBreaker
+from .leader import LeaderLease
+from .metrics import metrics
+from .utils import next_release_time
 
 
 class RankAPIClient:
     """周榜 API 客户端"""
 
-    def __init__(self, cache_manager: CacheManager):
+    def __init__(
+        self,
+        cache_manager: CacheManager,
+        http_client: HttpClient,
+        snapshot_ttl: int = DEFAULT_SNAPSHOT_TTL,
+        stale_grace: float = DEFAULT_STALE_GRACE,
+        breaker: Optional[CircuitBreaker] = None,
+        leader: Optional[LeaderLease] = None,
+    ):
         self.cache_manager = cache_manager
-        self._cached_data: Optional[RankResponse] = None
+        self.http_client = http_client
+        self.snapshot_ttl = snapshot_ttl
+        self.stale_grace = stale_grace
+        self.breaker = breaker or CircuitBreaker("api")
+        # 多实例共享缓存时只有主实例请求接口，其他实例读取主实例写入的缓存
+        self.leader = leader
+        self._cached_data: Optional[RankSnapshot] = None
+        # 内存快照最近一次从网络确认的时间，0 表示来自本地缓存、尚未确认
+        self._snapshot_at: float = 0.0
+        self._flight = SingleFlight()
+        metrics.register_gauge("snapshot_ranknum", lambda: self._cached_data.ranknum if self._cached_data else 0)
+        metrics.register_gauge("snapshot_age_seconds", lambda: time.time() - self._snapshot_at if self._snapshot_at else 0)
 
     @property
-    def cached_data(self) -> Optional[RankResponse]:
+    def cached_data(self) -> Optional[RankSnapshot]:
         """获取内存中缓存的数据"""
         return self._cached_data
 
     @cached_data.setter
-    def cached_data(self, value: Optional[RankResponse]) -> None:
+    def cached_data(self, value: Optional[RankSnapshot]) -> None:
         """设置内存中缓存的数据"""
         self._cached_data = value
+        self._snapshot_at = 0.0
 
-    async def fetch_rank_data(self) -> Optional[RankResponse]:
-        """从 API 获取最新周榜数据，失败时返回本地缓存"""
+    # ==================== 内存快照 ====================
+
+    def snapshot_expires_at(self) -> float:
+        """计算内存快照的过期时间
+
+        下一期预计发布之前数据不会变化，快照始终有效；
+        发布时间过后，每隔 snapshot_ttl 秒才允许重新请求一次
+        """
+        if self._cached_data is None:
+            return 0.0
+        expires_at = self._snapshot_at + self.snapshot_ttl if self._snapshot_at else 0.0
+        next_release = next_release_time(
+            self._cached_data.generate_timestamp,
+            self._cached_data.collect_end_time_timestamp,
+        )
+        if next_release is not None:
+            expires_at = max(expires_at, next_release)
+        return expires_at
+
+    def is_snapshot_fresh(self) -> bool:
+        """检查内存快照是否仍然新鲜"""
+        return time.time() < self.snapshot_expires_at()
+
+    async def get_rank_data(self) -> Optional[RankSnapshot]:
+        """获取周榜数据，快照新鲜时直接从内存返回
+
+        快照过期时在后台刷新（stale-while-revalidate）：刷新在 stale_grace 秒内完成则返回新数据，
+        否则先返回旧快照，刷新继续在后台进行；内存中没有任何数据时才等待刷新完成
+        """
+        if self.is_snapshot_fresh():
+            metrics.inc("snapshot_hits_total")
+            return self._cached_data
+        metrics.inc("snapshot_misses_total")
+        if self._cached_data is None:
+            return await self.fetch_rank_data()
+
+        refresh = asyncio.ensure_future(self.fetch_rank_data())
+        try:
+            return await asyncio.wait_for(asyncio.shield(refresh), timeout=max(0.0, self.stale_grace))
+        except asyncio.TimeoutError:
+            metrics.inc("snapshot_stale_served_total")
+            return self._cached_data
+
+    # ==================== 网络请求 ====================
+
+    async def fetch_rank_data(self) -> Optional[RankSnapshot]:
+        """从 API 获取最新周榜数据，失败时返回本地缓存
+
+        并发调用会合并为同一次网络请求；非主实例在已有数据时改为读取共享缓存
+        """
+        if self.leader is not None and self.leader.is_follower and self._cached_data is not None:
+            return await self.sync_from_cache()
+        return await self._flight.do(RANK_API_URL, self._timed_fetch_rank_data)
+
+    async def sync_from_cache(self) -> Optional[RankSnapshot]:
+        """读取其他实例写入共享缓存的新一期，不请求网络"""
+        if await self.cache_manager.sync_from_disk() or self._cached_data is None:
+            latest = await self.cache_manager.get_latest_cache()
+            if latest is not None and (self._cached_data is None or latest.ranknum > self._cached_data.ranknum):
+                logger.info(f"已从共享缓存加载第 {latest.ranknum} 期")
+                self._cached_data = latest
+        if self._cached_data is not None:
+            self._snapshot_at = time.time()
+        return self._cached_data
+
+    async def _timed_fetch_rank_data(self) -> Optional[RankSnapshot]:
+        """记录一次实际网络请求（含降级）的耗时"""
+        with metrics.timer("api_fetch_seconds"):
+            return await self._fetch_rank_data()
+
+    async def _fetch_rank_data(self) -> Optional[RankSnapshot]:
+        """实际执行网络请求，携带 ETag / Last-Modified 做条件请求；熔断期间直接降级"""
+        if not self.breaker.allow():
+            logger.debug(f"周榜 API 熔断中，{self.breaker.retry_after():.0f} 秒后重试")
+            return await self._fallback()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(RANK_API_URL, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                    if response.status != 200:
-                        logger.error(f"API 请求失败，状态码: {response.status}")
-                        return self.cache_manager.get_latest_cache()
+            validators = await self.cache_manager.load_validators()
+            result = await self._request_latest(validators)
+
+            if result is None:
+                # 304 Not Modified：直接复用已有数据
+                reused = await self._reuse_unmodified(validators)
+                if reused is not None:
+                    return reused
+                # 本地已无对应数据，去掉条件头重新请求
+                logger.warning("服务端返回 304 但本地无对应缓存，重新完整请求")
+                result = await self._request_latest(None)
+                if result is None:
+                    return await self._fallback()
+
+            data, new_validators = result
+            if not data:
+                return await self._fallback()
 
-                    data = await response.json()
+            # 写入缓存前完成校验，格式异常的数据不会以可信身份落盘
+            snapshot = RankSnapshot.from_dict(data)
+            snapshot.validate()
+            # 数据可用才算一次成功，连续返回异常数据时熔断器能够打开
+            self.breaker.record_success()
 
-                    # 检查是否已缓存该期
-                    ranknum = data.get("ranknum")
-                    existing = self.cache_manager.load_cache(ranknum) if ranknum else None
+            # 检查是否已缓存该期
+            if not await self.cache_manager.has_cache(snapshot.ranknum):
+                await self.cache_manager.save_cache(data)
 
-                    if existing is None:
-                        self.cache_manager.save_cache(data)
+            # 校验器只在该期已落盘后保存，否则之后的 304 找不到对应缓存
+            if new_validators and await self.cache_manager.has_cache(snapshot.ranknum):
+                await self.cache_manager.save_validators(new_validators)
 
-                    self._cached_data = RankResponse(**data)
-                    return self._cached_data
+            self._cached_data = snapshot
+            self._snapshot_at = time.time()
+            return self._cached_data
+
+        except ValueError as e:
+            # 上游持续返回异常数据时同样熔断，避免每条命令都重新请求并校验
+            logger.error(f"周榜数据格式无效，使用已有数据: {e}")
+            metrics.inc("api_failures_total")
+            self.breaker.record_failure()
+            return await self._fallback()
 
         except asyncio.TimeoutError:
             logger.error("API 请求超时")
-            return self.cache_manager.get_latest_cache()
+            metrics.inc("api_failures_total")
+            self.breaker.record_failure()
+            return await self._fallback()
         except aiohttp.ClientError as e:
             logger.error(f"网络请求错误: {e}")
-            return self.cache_manager.get_latest_cache()
+            metrics.inc("api_failures_total")
+            self.breaker.record_failure()
+            return await self._fallback()
         except Exception as e:
             logger.error(f"获取周榜数据失败: {e}")
-            return self.cache_manager.get_latest_cache()
+            metrics.inc("api_failures_total")
+            return await self._fallback()
+
+    async def _request_latest(self, validators: Optional[dict]) -> Optional[Tuple[dict, Optional[dict]]]:
+        """请求 latest.json，返回 (数据, 新校验器)
+
+        返回 None 表示 304 未修改，数据为空字典表示请求失败；
+        新校验器包含响应中的 ETag / Last-Modified 与期号，由调用方在该期落盘后保存
+        """
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        session = self.http_client.session
+        metrics.inc("api_requests_total")
+        async with session.get(RANK_API_URL, headers=headers, timeout=self.http_client.api_timeout) as response:
+            if response.status == 304 and headers:
+                logger.debug("周榜数据未修改 (304)")
+                metrics.inc("api_not_modified_total")
+                self.breaker.record_success()
+                return None
+            if response.status != 200:
+                logger.error(f"API 请求失败，状态码: {response.status}")
+                metrics.inc("api_failures_total")
+                self.breaker.record_failure()
+                return {}, None
+
+            data = await response.json()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        if not (data.get("ranknum") and (etag or last_modified)):
+            return data, None
+        return data, {"ranknum": data["ranknum"], "etag": etag, "last_modified": last_modified}
+
+    async def _reuse_unmodified(self, validators: dict) -> Optional[RankSnapshot]:
+        """处理 304 响应：返回校验器对应期号的内存快照或本地缓存"""
+        ranknum = validators.get("ranknum")
+        if self._cached_data is None or self._cached_data.ranknum != ranknum:
+            cached = await self.cache_manager.load_cache(ranknum) if ranknum else None
+            if cached is None:
+                return None
+            self._cached_data = cached
+        self._snapshot_at = time.time()
+        return self._cached_data
+
+    async def _fallback(self) -> Optional[RankSnapshot]:
+        """请求失败时的降级数据，优先使用内存快照，其次读取本地缓存"""
+        metrics.inc("api_fallbacks_total")
+        if self._cached_data is not None:
+            return self._cached_data
+        return await self.load_from_cache()
 
-    def load_from_cache(self) -> Optional[RankResponse]:
+    async def load_from_cache(self) -> Optional[RankSnapshot]:
         """从本地缓存加载数据到内存"""
-        self._cached_data = self.cache_manager.get_latest_cache()
+        self._cached_data = await self.cache_manager.get_latest_cache()
+        self._snapshot_at = 0.0
         return self._cached_data
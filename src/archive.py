@@ -0,0 +1,169 @@
+"""
+冷存储模块 - 将超出热缓存保留期数的旧期压缩追加到归档文件
+
+归档文件只追加写入，每期一条 zlib 压缩的紧凑 JSON 记录（只保留指标，不含封面），
+索引文件记录每期记录的 [偏移, 长度]，读取单期时直接定位，无需解压整个归档。
+超过保留上限时重写到新的归档文件（压实），再原子切换索引。
+"""
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from astrbot.api import logger
+
+from .constants import VIDEO_LIST_FIELDS
+from .snapshot import encode_json, decode_json
+from .utils import atomic_write_bytes
+
+# 归档中保留的视频字段（去掉封面与 referSource 等大字段）
+ARCHIVED_VIDEO_FIELDS = (
+    "avid", "title", "url", "pubdate", "rank", "ext_rank", "superHit_times",
+    "point", "play", "coin", "comment", "danmaku", "favorite", "like", "share",
+)
+
+# 归档中保留的元数据字段
+ARCHIVED_META_FIELDS = (
+    "version", "ranknum", "url", "pubdate", "generate_time", "generate_timestamp",
+    "collect_start_time", "collect_end_time", "collect_start_time_timestamp",
+    "collect_end_time_timestamp", "statistic",
+)
+
+
+def compact_issue(data: dict) -> dict:
+    """提取一期数据中需要归档的部分"""
+    compact = {key: data[key] for key in ARCHIVED_META_FIELDS if key in data}
+    for field in VIDEO_LIST_FIELDS:
+        compact[field] = [
+            {key: video[key] for key in ARCHIVED_VIDEO_FIELDS if key in video}
+            for video in data.get(field, [])
+            if isinstance(video, dict)
+        ]
+    return compact
+
+
+class IssueArchive:
+    """周榜冷存储归档（非线程安全，调用方负责加锁并在工作线程中调用）"""
+
+    def __init__(self, archive_dir: Path):
+        self.archive_dir = archive_dir
+        self.index_path = archive_dir / "archive_index.json"
+        self._file_name: Optional[str] = None
+        self._generation = 0
+        # 期号 -> [偏移, 长度]
+        self._offsets: Dict[int, List[int]] = {}
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        """索引是否已加载"""
+        return self._loaded
+
+    def __contains__(self, ranknum: int) -> bool:
+        return ranknum in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def ranknums(self) -> List[int]:
+        """已归档的期号（从旧到新）"""
+        return sorted(self._offsets)
+
+    def _archive_file(self) -> Path:
+        return self.archive_dir / self._file_name
+
+    # ==================== 索引 ====================
+
+    def load(self) -> None:
+        """加载归档索引（可重复调用以读取其他实例的更新）"""
+        self._loaded = True
+        self._file_name = None
+        self._generation = 0
+        self._offsets = {}
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._file_name = data["file"]
+            self._generation = data.get("generation", 0)
+            self._offsets = {int(ranknum): location for ranknum, location in data["issues"].items()}
+        except Exception as e:
+            logger.error(f"读取归档索引失败: {e}")
+
+    def _save_index(self) -> None:
+        """原子写入索引"""
+        data = {
+            "file": self._file_name,
+            "generation": self._generation,
+            "issues": {str(ranknum): location for ranknum, location in sorted(self._offsets.items())},
+        }
+        atomic_write_bytes(self.index_path, json.dumps(data).encode("utf-8"))
+
+    # ==================== 读写 ====================
+
+    def append(self, ranknum: int, data: dict) -> None:
+        """压缩并追加一期到归档末尾"""
+        if ranknum in self._offsets:
+            return
+        if self._file_name is None:
+            self._file_name = f"archive_{self._generation}.bin"
+
+        record = zlib.compress(encode_json(compact_issue(data)))
+        with open(self._archive_file(), "ab") as f:
+            offset = f.tell()
+            f.write(record)
+        # 先写数据再更新索引，中途失败只会在文件末尾留下未被引用的字节
+        self._offsets[ranknum] = [offset, len(record)]
+        try:
+            self._save_index()
+        except BaseException:
+            # 索引未落盘时不视为已归档，调用方会保留热缓存并在下次重试
+            del self._offsets[ranknum]
+            raise
+
+    def read(self, ranknum: int) -> Optional[dict]:
+        """定位并解压单期记录"""
+        location = self._offsets.get(ranknum)
+        if location is None:
+            return None
+        offset, length = location
+        with open(self._archive_file(), "rb") as f:
+            f.seek(offset)
+            return decode_json(zlib.decompress(f.read(length)))
+
+    def enforce_limit(self, max_issues: int) -> List[int]:
+        """归档期数超过上限时丢弃最旧的期并压实归档文件，返回被丢弃的期号（0 表示不限）
+
+        允许超出上限约 10% 后再批量压实，避免每期都重写整个归档
+        """
+        if max_issues <= 0 or len(self._offsets) <= max_issues + max_issues // 10:
+            return []
+
+        ranknums = self.ranknums
+        dropped = ranknums[:len(ranknums) - max_issues]
+        kept = ranknums[len(ranknums) - max_issues:]
+
+        old_file = self._archive_file()
+        new_name = f"archive_{self._generation + 1}.bin"
+        new_offsets: Dict[int, List[int]] = {}
+        chunks = []
+        position = 0
+        with open(old_file, "rb") as f:
+            for ranknum in kept:
+                offset, length = self._offsets[ranknum]
+                f.seek(offset)
+                chunks.append(f.read(length))
+                new_offsets[ranknum] = [position, length]
+                position += length
+        atomic_write_bytes(self.archive_dir / new_name, b"".join(chunks))
+
+        # 新文件就绪后再切换索引，最后删除旧文件
+        self._file_name = new_name
+        self._generation += 1
+        self._offsets = new_offsets
+        self._save_index()
+        old_file.unlink(missing_ok=True)
+        logger.info(f"归档已压实，丢弃 {len(dropped)} 期，保留 {len(kept)} 期")
+        return dropped
@@ -0,0 +1,169 @@
+"""
+榜单长图模块 - 将一个榜单的 Top 10 合成为单张图片，一次上传代替十条消息
+"""
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from astrbot.api import logger
+
+from .constants import BOARD_FONT_CANDIDATES
+from .utils import atomic_write_bytes
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Pillow 为可选依赖，缺失时回退为逐条消息
+    Image = ImageDraw = ImageFont = None
+
+# 画布与行布局（像素）
+BOARD_WIDTH = 900
+BOARD_PADDING = 24
+HEADER_HEIGHT = 96
+ROW_HEIGHT = 148
+COVER_SIZE = (192, 120)
+RANK_COLUMN = 72
+
+BACKGROUND = (250, 250, 252)
+ROW_SHADE = (240, 242, 247)
+HEADER_COLOR = (57, 197, 187)
+TEXT_COLOR = (34, 34, 34)
+MUTED_COLOR = (110, 110, 120)
+PLACEHOLDER_COLOR = (210, 214, 222)
+
+
+class BoardRow(NamedTuple):
+    """长图中一个视频的已格式化内容"""
+    rank: int
+    title: str
+    metrics: str
+    footer: str
+    # 本地封面路径，空字符串表示无封面
+    cover_path: str
+
+
+class BoardRenderer:
+    """榜单长图渲染器，在独立线程池中绘制并编码，不阻塞事件循环"""
+
+    def __init__(self, font_path: str = "", quality: int = 85):
+        self.quality = quality
+        self._configured_font = font_path
+        # 字体在首次使用时查找，插件加载时不访问磁盘
+        self._font_path: Optional[str] = None
+        self._font_resolved = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if Image is None:
+            logger.info("未安装 Pillow，无法使用榜单长图模式")
+
+    @property
+    def font_path(self) -> Optional[str]:
+        """可显示中文的字体路径，找不到时为 None"""
+        if not self._font_resolved:
+            self._font_resolved = True
+            if Image is not None:
+                self._font_path = self._find_font(self._configured_font)
+                if self._font_path is None:
+                    logger.warning("未找到可显示中文的字体，无法使用榜单长图模式，请在配置中指定 board_font_path")
+        return self._font_path
+
+    @property
+    def available(self) -> bool:
+        """Pillow 与中文字体均可用"""
+        return self.font_path is not None
+
+    @staticmethod
+    def _find_font(font_path: str) -> Optional[str]:
+        """优先使用配置的字体，否则在常见位置查找中文字体"""
+        for candidate in ([font_path] if font_path else []) + list(BOARD_FONT_CANDIDATES):
+            if Path(candidate).is_file():
+                return candidate
+        return None
+
+    async def render(self, header: str, rows: List[BoardRow], dst: Path) -> None:
+        """在线程池中绘制长图并原子写入 dst"""
+        if self._executor is None:
+            # 单线程即可：长图按 (期号, 榜单) 缓存，只在新一期或首次查询时绘制
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vocaloid-board")
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(self._executor, self._render_sync, header, rows)
+        await loop.run_in_executor(self._executor, atomic_write_bytes, dst, content)
+
+    def _render_sync(self, header: str, rows: List[BoardRow]) -> bytes:
+        height = HEADER_HEIGHT + ROW_HEIGHT * len(rows) + BOARD_PADDING
+        canvas = Image.new("RGB", (BOARD_WIDTH, height), BACKGROUND)
+        draw = ImageDraw.Draw(canvas)
+        title_font = ImageFont.truetype(self.font_path, 34)
+        rank_font = ImageFont.truetype(self.font_path, 30)
+        text_font = ImageFont.truetype(self.font_path, 24)
+        small_font = ImageFont.truetype(self.font_path, 20)
+
+        draw.rectangle((0, 0, BOARD_WIDTH, HEADER_HEIGHT - 12), fill=HEADER_COLOR)
+        draw.text((BOARD_PADDING, 22), header, font=title_font, fill=(255, 255, 255))
+
+        text_left = BOARD_PADDING + RANK_COLUMN + COVER_SIZE[0] + 20
+        text_width = BOARD_WIDTH - text_left - BOARD_PADDING
+        for idx, row in enumerate(rows):
+            top = HEADER_HEIGHT + idx * ROW_HEIGHT
+            if idx % 2 == 0:
+                draw.rectangle((0, top, BOARD_WIDTH, top + ROW_HEIGHT), fill=ROW_SHADE)
+
+            draw.text((BOARD_PADDING, top + 52), f"#{row.rank}", font=rank_font, fill=HEADER_COLOR)
+
+            cover_box = (BOARD_PADDING + RANK_COLUMN, top + 14)
+            cover = self._load_cover(row.cover_path)
+            if cover is not None:
+                canvas.paste(cover, cover_box)
+            else:
+                draw.rectangle(
+                    (*cover_box, cover_box[0] + COVER_SIZE[0], cover_box[1] + COVER_SIZE[1]),
+                    fill=PLACEHOLDER_COLOR,
+                )
+
+            draw.text((text_left, top + 16), self._fit(row.title, text_font, text_width), font=text_font, fill=TEXT_COLOR)
+            draw.text((text_left, top + 60), self._fit(row.metrics, small_font, text_width), font=small_font, fill=TEXT_COLOR)
+            draw.text((text_left, top + 96), self._fit(row.footer, small_font, text_width), font=small_font, fill=MUTED_COLOR)
+
+        buffer = io.BytesIO()
+        canvas.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _load_cover(cover_path: str):
+        """读取封面并裁剪缩放到固定尺寸，失败时返回 None 使用占位块"""
+        if not cover_path:
+            return None
+        try:
+            with Image.open(cover_path) as img:
+                img.draft("RGB", (COVER_SIZE[0] * 2, COVER_SIZE[1] * 2))
+                img = img.convert("RGB")
+                # 按目标比例居中裁剪后缩放
+                ratio = COVER_SIZE[0] / COVER_SIZE[1]
+                width, height = img.size
+                if width / height > ratio:
+                    crop_width = int(height * ratio)
+                    left = (width - crop_width) // 2
+                    img = img.crop((left, 0, left + crop_width, height))
+                else:
+                    crop_height = int(width / ratio)
+                    top = (height - crop_height) // 2
+                    img = img.crop((0, top, width, top + crop_height))
+                return img.resize(COVER_SIZE, Image.LANCZOS)
+        except Exception as e:
+            logger.debug(f"读取封面失败，使用占位块: {e}")
+            return None
+
+    @staticmethod
+    def _fit(text: str, font, max_width: int) -> str:
+        """超出宽度的文本截断并加省略号"""
+        if font.getlength(text) <= max_width:
+            return text
+        while text and font.getlength(text + "…") > max_width:
+            text = text[:-1]
+        return text + "…"
+
+    def close(self) -> None:
+        """关闭线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
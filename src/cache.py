@@ -1,103 +1,507 @@
 """
 缓存管理模块 - 处理周榜数据和封面图片的本地缓存
 """
+import asyncio
 import json
 import hashlib
+import os
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import aiohttp
 
 from astrbot.api import logger
 
-from .constants import CACHE_DIR_NAME, COVER_CACHE_DIR_NAME, MAX_CACHE_COUNT
-from .types import RankResponse
+from .constants import (
+    CACHE_DIR_NAME,
+    COVER_CACHE_DIR_NAME,
+    BOARD_CACHE_DIR_NAME,
+    MAX_CACHE_COUNT,
+    DEFAULT_ARCHIVE_MAX_ISSUES,
+    DEFAULT_COVER_CONCURRENCY,
+    DEFAULT_COVER_DEADLINE,
+    DEFAULT_WARMUP_CONCURRENCY,
+    DEFAULT_COVER_CACHE_MAX_MB,
+    COVER_INDEX_SAVE_DELAY,
+    VIDEO_LIST_FIELDS,
+)
+from .types import RankSnapshot
+from .singleflight import SingleFlight
+from .http_client import HttpClient
+from .manifest import CacheManifest
+from .cover_store import CoverStore
+from .archive import IssueArchive
+from .history import IssueIndex
+from .search import TitleSearchIndex
+from .thumbnail import ThumbnailPipeline, is_thumbnail, thumbnail_owner_stem
+from .metrics import metrics
+from .circuit_breaker import CircuitBreaker
+from .snapshot import SNAPSHOT_SUFFIX, SnapshotReader, encode_snapshot
+from .file_lock import FileLock
+from .utils import atomic_write_bytes
 
 
 class CacheManager:
     """缓存管理器，负责周榜数据和封面图片的本地缓存"""
 
-    def __init__(self):
-        self._ensure_cache_dirs()
+    def __init__(
+        self,
+        http_client: HttpClient,
+        cover_concurrency: int = DEFAULT_COVER_CONCURRENCY,
+        cover_deadline: float = DEFAULT_COVER_DEADLINE,
+        cover_cache_max_mb: int = DEFAULT_COVER_CACHE_MAX_MB,
+        hot_issue_count: int = MAX_CACHE_COUNT,
+        archive_max_issues: int = DEFAULT_ARCHIVE_MAX_ISSUES,
+        thumbnails: Optional[ThumbnailPipeline] = None,
+        cover_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.http_client = http_client
+        self.thumbnails = thumbnails
+        self.cover_breaker = cover_breaker or CircuitBreaker("cover")
+        self.cover_concurrency = cover_concurrency
+        self.cover_deadline = cover_deadline
+        self.hot_issue_count = max(1, hot_issue_count)
+        self.archive_max_issues = archive_max_issues
+        self._cover_flight = SingleFlight()
+        # resolve_covers 创建的封面获取任务
+        self._cover_tasks: set = set()
+        # 正在下载或生成缩略图的封面（按文件名主干，缩略图同名）-> 进行中的次数，清理时跳过这些封面
+        self._busy_covers: Counter = Counter()
+        self._lock = asyncio.Lock()
+        # 构造时只计算路径，目录在首次访问磁盘时（工作线程中）创建
+        self.cache_dir = Path("data") / CACHE_DIR_NAME
+        self._dirs_ready = False
+        # 多个实例共享缓存目录时，对缓存的修改在此文件锁内进行
+        self._file_lock = FileLock(self.cache_dir / "cache.lock")
+        # 其他实例更新了清单，历史索引需要重建
+        self._indexes_stale = False
+        self._manifest = CacheManifest(self.get_cache_dir() / "manifest.json")
+        self._covers = CoverStore(
+            self.get_cover_cache_dir(),
+            self.get_cache_dir() / "cover_index.json",
+            cover_cache_max_mb * 1024 * 1024,
+        )
+        self._index_save_task: Optional[asyncio.Task] = None
+        self._archive = IssueArchive(self.get_cache_dir())
+        self._history = IssueIndex()
+        self._search = TitleSearchIndex()
+        metrics.register_gauge("cover_cache_bytes", lambda: self._covers.total_bytes)
+        metrics.register_gauge("cover_cache_files", lambda: len(self._covers))
+        metrics.register_gauge("hot_issues", lambda: len(self._manifest.ranknums()))
+        metrics.register_gauge("archived_issues", lambda: len(self._archive))
 
     def _ensure_cache_dirs(self) -> None:
-        """确保缓存目录存在"""
-        self.get_cache_dir()
-        self.get_cover_cache_dir()
+        """确保缓存目录存在（在工作线程中执行）"""
+        if self._dirs_ready:
+            return
+        for directory in (self.get_cache_dir(), self.get_cover_cache_dir(), self.get_board_dir()):
+            directory.mkdir(parents=True, exist_ok=True)
+        self._dirs_ready = True
+
+    # ==================== 启动加载 ====================
+
+    async def hydrate(self) -> None:
+        """启动时在后台加载清单、封面索引与冷存储索引，完成后查询不再需要读取索引文件"""
+        async with self._lock:
+            await asyncio.to_thread(self._locked, self._hydrate_sync)
+
+    def _hydrate_sync(self) -> None:
+        """hydrate 的同步实现（在工作线程中执行），封面文件的存在性检查留给 verify_covers"""
+        self._ensure_manifest(verify_covers=False)
+        self._ensure_archive()
+
+    async def verify_covers(self) -> None:
+        """核对封面索引中的文件是否仍然存在，移除已被外部删除的条目
+
+        逐个检查文件时不持有缓存锁（封面索引自身是线程安全的），只在保存索引时加锁
+        """
+        await self._load_manifest()
+        missing = await asyncio.to_thread(self._covers.verify)
+        if missing:
+            logger.info(f"封面索引中有 {missing} 张封面文件已不存在，已移除")
+            await self.flush()
+
+    # ==================== 多实例同步 ====================
+
+    def _locked(self, func, *args):
+        """持有跨进程文件锁执行 func，执行前先读取其他实例的更新（在工作线程中执行）"""
+        with self._file_lock:
+            if self._manifest.loaded:
+                self._sync_from_disk()
+            return func(*args)
+
+    def _sync_from_disk(self) -> bool:
+        """清单被其他实例更新时重新加载清单、封面索引与冷存储索引，返回是否有更新（需持有锁）"""
+        if not self._manifest.changed_on_disk():
+            return False
+        if not self._manifest.load():
+            self._rebuild_manifest()
+        if self._covers.loaded:
+            self._covers.set_refcounts(self._manifest.cover_refcounts())
+            self._covers.merge_from_disk()
+        if self._archive.loaded:
+            self._archive.load()
+        self._indexes_stale = True
+        metrics.inc("cache_reloads_total")
+        return True
+
+    async def sync_from_disk(self) -> bool:
+        """检查其他实例是否更新了缓存（未更新时只做一次 stat），返回是否重新加载"""
+        if not self._manifest.loaded or not await asyncio.to_thread(self._manifest.changed_on_disk):
+            return False
+        async with self._lock:
+            return await asyncio.to_thread(self._locked_sync_from_disk)
+
+    def _locked_sync_from_disk(self) -> bool:
+        with self._file_lock:
+            return self._sync_from_disk()
 
     # ==================== 周榜数据缓存 ====================
 
     def get_cache_dir(self) -> Path:
         """获取缓存目录路径，存储在 data/ 目录下"""
-        cache_dir = Path("data") / CACHE_DIR_NAME
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        return cache_dir
+        return self.cache_dir
+
+    def _get_cache_file(self, ranknum: int) -> Path:
+        """获取指定期号的缓存文件路径"""
+        return self.get_cache_dir() / f"rank_{ranknum}{SNAPSHOT_SUFFIX}"
+
+    def _read_issue_file(self, cache_file: Path) -> dict:
+        """读取缓存文件为原始字典，兼容旧版 JSON 格式（在工作线程中执行）"""
+        if cache_file.suffix == SNAPSHOT_SUFFIX:
+            return SnapshotReader(cache_file).read_all()
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # ==================== 缓存清单 ====================
 
-    def load_cache(self, ranknum: int) -> Optional[RankResponse]:
-        """按期号加载本地缓存"""
-        cache_file = self.get_cache_dir() / f"rank_{ranknum}.json"
+    def _ensure_manifest(self, verify_covers: bool = True) -> CacheManifest:
+        """确保清单与封面索引已加载，清单缺失或损坏时扫描现有缓存文件重建（需持有锁，在工作线程中执行）"""
+        self._ensure_cache_dirs()
+        if not self._manifest.loaded:
+            if not self._manifest.load():
+                self._rebuild_manifest()
+            self._migrate_legacy_caches()
+        if not self._covers.loaded:
+            self._covers.load(self._manifest.cover_refcounts(), verify=verify_covers)
+        return self._manifest
+
+    def _rebuild_manifest(self) -> None:
+        """扫描缓存目录重建清单，仅在首次升级或清单损坏时发生"""
+        # 按文件名排序，同一期同时存在两种格式时快照文件（.vrs）后登记并覆盖旧版 JSON
+        for cache_file in sorted(self.get_cache_dir().glob("rank_*"), key=lambda f: f.suffix == SNAPSHOT_SUFFIX):
+            if cache_file.suffix not in (".json", SNAPSHOT_SUFFIX):
+                continue
+            try:
+                data = self._read_issue_file(cache_file)
+                ranknum = data.get("ranknum")
+                if ranknum:
+                    previous = self._manifest.get_issue(ranknum)
+                    self._register_issue(ranknum, cache_file, data)
+                    if previous is not None and previous["file"] != cache_file.name:
+                        (self.get_cache_dir() / previous["file"]).unlink(missing_ok=True)
+            except Exception as e:
+                logger.warning(f"重建缓存清单时跳过 {cache_file.name}: {e}")
+        self._manifest.save()
+        logger.info(f"已重建缓存清单，共 {len(self._manifest.issues)} 期")
+
+    def _migrate_legacy_caches(self) -> None:
+        """将清单中的旧版 JSON 缓存转换为快照格式"""
+        legacy = [
+            ranknum for ranknum, entry in self._manifest.issues.items()
+            if not entry["file"].endswith(SNAPSHOT_SUFFIX)
+        ]
+        for ranknum in legacy:
+            legacy_file = self.get_cache_dir() / self._manifest.issues[ranknum]["file"]
+            try:
+                data = self._read_issue_file(legacy_file)
+                cache_file = self._get_cache_file(ranknum)
+                atomic_write_bytes(cache_file, encode_snapshot(data))
+                self._register_issue(ranknum, cache_file, data)
+                self._manifest.save()
+                legacy_file.unlink(missing_ok=True)
+            except Exception as e:
+                logger.warning(f"迁移旧版缓存 {legacy_file.name} 失败: {e}")
+        if legacy:
+            logger.info(f"已将 {len(legacy)} 期旧版 JSON 缓存迁移为快照格式")
+
+    def _register_issue(self, ranknum: int, cache_file: Path, data: dict) -> None:
+        """将一期缓存登记到清单并增加其封面的引用计数（不落盘）"""
+        cover_files = [self.get_cover_cache_path(url).name for url in self._extract_cover_urls_from_rank(data)]
+        previous = self._manifest.get_issue(ranknum)
+        if previous is not None and self._covers.loaded:
+            self._covers.release(previous.get("covers", []))
+        if self._covers.loaded:
+            self._covers.retain(cover_files)
+        self._manifest.add_issue(
+            ranknum,
+            cache_file.name,
+            cache_file.stat().st_size,
+            data.get("generate_timestamp"),
+            cover_files,
+        )
+
+    async def _load_manifest(self) -> CacheManifest:
+        """获取已加载的清单"""
+        if not self._manifest.loaded:
+            async with self._lock:
+                await asyncio.to_thread(self._locked, self._ensure_manifest)
+        return self._manifest
+
+    # ==================== 周榜数据读写 ====================
+
+    async def has_cache(self, ranknum: int) -> bool:
+        """检查指定期号是否已缓存（只查清单，不读取文件）"""
+        manifest = await self._load_manifest()
+        return manifest.get_issue(ranknum) is not None
+
+    async def _get_issue_file(self, ranknum: int) -> Optional[Path]:
+        """从清单获取指定期号的缓存文件路径"""
+        manifest = await self._load_manifest()
+        entry = manifest.get_issue(ranknum)
+        if entry is None:
+            return None
+        return self.get_cache_dir() / entry["file"]
+
+    async def load_cache(self, ranknum: int) -> Optional[RankSnapshot]:
+        """按期号加载本地缓存，热缓存中没有时从冷存储读取（冷存储中的期不含封面）"""
+        cache_file = await self._get_issue_file(ranknum)
+        if cache_file is not None:
+            with metrics.timer("cache_load_seconds"):
+                return await asyncio.to_thread(self._load_cache_file, cache_file)
+        metrics.inc("archive_reads_total")
+        async with self._lock:
+            return await asyncio.to_thread(self._load_archived_sync, ranknum)
+
+    def _load_archived_sync(self, ranknum: int) -> Optional[RankSnapshot]:
+        """从冷存储读取单期（在工作线程中执行）"""
+        try:
+            data = self._ensure_archive().read(ranknum)
+            return RankSnapshot.from_dict(data, trusted=True) if data else None
+        except Exception as e:
+            logger.error(f"读取冷存储第 {ranknum} 期失败: {e}")
+            return None
+
+    def _load_cache_file(self, cache_file: Path) -> Optional[RankSnapshot]:
+        """读取并解析缓存文件（在工作线程中执行）"""
         if not cache_file.exists():
             return None
         try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return RankResponse(**data)
+            if cache_file.suffix == SNAPSHOT_SUFFIX:
+                # 只解析头部，列表字节在首次访问时才解码
+                reader = SnapshotReader(cache_file)
+                return RankSnapshot(reader.meta, reader.read_raw_lists(), trusted=True)
+            return RankSnapshot.from_dict(self._read_issue_file(cache_file), trusted=True)
         except Exception as e:
             logger.error(f"加载缓存失败: {e}")
             return None
 
-    def save_cache(self, data: dict) -> None:
-        """保存周榜数据到本地缓存"""
+    async def save_cache(self, data: dict) -> None:
+        """保存周榜数据到本地缓存，同时更新清单并清理旧缓存"""
         try:
             ranknum = data.get("ranknum")
             if not ranknum:
                 logger.error("周榜数据缺少 ranknum 字段")
                 return
 
-            cache_file = self.get_cache_dir() / f"rank_{ranknum}.json"
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-
+            async with self._lock:
+                saved = await asyncio.to_thread(self._locked, self._save_cache_sync, ranknum, data)
+            if not saved:
+                logger.info(f"第 {ranknum} 期已由其他实例缓存")
+                return
             logger.info(f"已缓存第 {ranknum} 期周榜")
-            self.cleanup_old_caches()
+            # 索引在事件循环中更新，查询不会看到更新到一半的状态
+            if self._history.loaded:
+                lists = {field: data.get(field, []) for field in VIDEO_LIST_FIELDS}
+                self._history.add_issue(ranknum, lists)
+                self._search.add_issue(ranknum, (video for videos in lists.values() for video in videos))
+            await self.cleanup_old_caches()
         except Exception as e:
             logger.error(f"保存缓存失败: {e}")
 
-    def cleanup_old_caches(self) -> None:
-        """清理超过 MAX_CACHE_COUNT 期的旧缓存（包括对应的封面图片）"""
-        cache_dir = self.get_cache_dir()
-        cache_files = sorted(cache_dir.glob("rank_*.json"), key=lambda f: f.stat().st_mtime)
-
-        while len(cache_files) > MAX_CACHE_COUNT:
-            oldest = cache_files.pop(0)
-            # 先提取该期周榜中的所有封面 URL，然后删除对应的图片缓存
-            self._delete_covers_for_rank_file(oldest)
-            oldest.unlink()
-            logger.info(f"已删除旧缓存: {oldest.name}")
-
-    def get_latest_cache(self) -> Optional[RankResponse]:
-        """获取最新一期的本地缓存"""
-        cache_dir = self.get_cache_dir()
-        cache_files = sorted(cache_dir.glob("rank_*.json"), key=lambda f: f.stat().st_mtime, reverse=True)
-
-        if not cache_files:
+    def _save_cache_sync(self, ranknum: int, data: dict) -> bool:
+        """原子写入缓存文件后再登记到清单（在工作线程中执行），已由其他实例写入时返回 False"""
+        manifest = self._ensure_manifest()
+        cache_file = self._get_cache_file(ranknum)
+        previous = manifest.get_issue(ranknum)
+        if previous is not None and previous["file"] == cache_file.name:
+            return False
+        atomic_write_bytes(cache_file, encode_snapshot(data))
+        self._register_issue(ranknum, cache_file, data)
+        manifest.save()
+        # 同一期的旧版 JSON 文件已被快照替代
+        if previous is not None:
+            (self.get_cache_dir() / previous["file"]).unlink(missing_ok=True)
+        return True
+
+    def get_validators_path(self) -> Path:
+        """获取 HTTP 校验器（ETag / Last-Modified）文件路径"""
+        return self.get_cache_dir() / "validators.json"
+
+    async def load_validators(self) -> Optional[dict]:
+        """读取最近一次成功响应的 HTTP 校验器及其对应期号"""
+        return await asyncio.to_thread(self._load_validators_sync)
+
+    def _load_validators_sync(self) -> Optional[dict]:
+        """load_validators 的同步实现（在工作线程中执行）"""
+        validators_file = self.get_validators_path()
+        if not validators_file.exists():
+            return None
+        try:
+            with open(validators_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取 HTTP 校验器失败: {e}")
             return None
 
+    async def save_validators(self, validators: dict) -> None:
+        """保存 HTTP 校验器，供下次条件请求使用"""
         try:
-            with open(cache_files[0], "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return RankResponse(**data)
+            content = json.dumps(validators, ensure_ascii=False).encode("utf-8")
+            await asyncio.to_thread(self._save_validators_sync, content)
         except Exception as e:
-            logger.error(f"加载最新缓存失败: {e}")
+            logger.warning(f"保存 HTTP 校验器失败: {e}")
+
+    def _save_validators_sync(self, content: bytes) -> None:
+        """save_validators 的同步实现（在工作线程中执行）"""
+        self._ensure_cache_dirs()
+        atomic_write_bytes(self.get_validators_path(), content)
+
+    async def cleanup_old_caches(self) -> None:
+        """按期号将超过 hot_issue_count 期的旧缓存转入冷存储（并删除不再被引用的封面图片），
+        冷存储超过 archive_max_issues 期时丢弃最旧的期
+        """
+        async with self._lock:
+            dropped = await asyncio.to_thread(self._locked, self._cleanup_old_caches_sync)
+        # 转入冷存储的期仍保留在索引中，只有被彻底丢弃的期才移除
+        for ranknum in dropped:
+            self._history.remove_issue(ranknum)
+            self._search.remove_issue(ranknum)
+
+    def _cleanup_old_caches_sync(self) -> List[int]:
+        """cleanup_old_caches 的同步实现（在工作线程中执行），返回被彻底丢弃的期号"""
+        manifest = self._ensure_manifest()
+        archive = self._ensure_archive()
+        ranknums = manifest.ranknums()
+        evicted = []
+        while len(ranknums) > self.hot_issue_count:
+            oldest = ranknums.pop(0)
+            entry = manifest.get_issue(oldest)
+            cache_file = self.get_cache_dir() / entry["file"]
+            # 先写入冷存储，再从热缓存移除；归档失败时保留在热缓存中，下次清理时重试
+            try:
+                archive.append(oldest, self._read_issue_file(cache_file))
+            except Exception as e:
+                logger.error(f"归档第 {oldest} 期失败，暂不移出热缓存: {e}")
+                break
+            evicted.append(manifest.remove_issue(oldest))
+
+        if evicted:
+            # 先提交清单再删除文件，清单中的条目始终指向存在的文件
+            manifest.save()
+            deleted_count = 0
+            for entry in evicted:
+                (self.get_cache_dir() / entry["file"]).unlink(missing_ok=True)
+                logger.info(f"已将旧缓存转入冷存储: {entry['file']}")
+                # 仅删除引用计数归零的封面，仍被较新一期引用的封面保留
+                for name in self._covers.release(entry.get("covers", [])):
+                    # 正在下载或生成缩略图的封面暂不删除，之后由孤立封面清理或字节预算淘汰回收
+                    if not self._is_busy(Path(name).stem):
+                        deleted_count += self._covers.delete(name)
+            self._covers.save()
+
+            if deleted_count > 0:
+                logger.info(f"已删除 {deleted_count} 张不再被引用的封面图片缓存")
+            self._cleanup_boards_sync(set(manifest.ranknums()))
+
+        return archive.enforce_limit(self.archive_max_issues)
+
+    def _ensure_archive(self) -> IssueArchive:
+        """确保冷存储索引已加载（需持有锁，在工作线程中执行）"""
+        if not self._archive.loaded:
+            self._archive.load()
+        return self._archive
+
+    async def get_latest_cache(self) -> Optional[RankSnapshot]:
+        """获取期号最大的一期本地缓存"""
+        manifest = await self._load_manifest()
+        latest = manifest.latest_ranknum()
+        if latest is None:
             return None
+        return await asyncio.to_thread(self._load_cache_file, self.get_cache_dir() / manifest.issues[latest]["file"])
+
+    # ==================== 历史索引 ====================
+
+    async def _ensure_indexes(self) -> None:
+        """首次查询时基于所有已缓存期构建历史索引与标题搜索索引，此后随保存/淘汰增量更新"""
+        if not self._history.loaded or self._indexes_stale:
+            async with self._lock:
+                if not self._history.loaded or self._indexes_stale:
+                    self._indexes_stale = False
+                    self._history, self._search = await asyncio.to_thread(self._build_indexes_sync)
+
+    async def get_history_index(self) -> IssueIndex:
+        """获取跨期视频索引"""
+        await self._ensure_indexes()
+        return self._history
+
+    async def get_search_index(self) -> TitleSearchIndex:
+        """获取视频标题搜索索引"""
+        await self._ensure_indexes()
+        return self._search
+
+    def _build_indexes_sync(self) -> Tuple[IssueIndex, TitleSearchIndex]:
+        """读取所有已缓存期构建新的索引（在工作线程中执行）"""
+        manifest = self._ensure_manifest()
+        archive = self._ensure_archive()
+        history = IssueIndex()
+        search = TitleSearchIndex()
+        ranknums = sorted(set(manifest.issues) | set(archive.ranknums))
+        for ranknum in ranknums:
+            try:
+                entry = manifest.get_issue(ranknum)
+                if entry is not None:
+                    data = self._read_issue_file(self.get_cache_dir() / entry["file"])
+                else:
+                    data = archive.read(ranknum)
+                lists = {field: data.get(field, []) for field in VIDEO_LIST_FIELDS}
+                history.add_issue(ranknum, lists)
+                search.add_issue(ranknum, (video for videos in lists.values() for video in videos))
+            except Exception as e:
+                logger.warning(f"索引第 {ranknum} 期失败: {e}")
+        history.mark_loaded()
+        logger.info(f"历史索引构建完成，共 {len(history.issues)} 期、{len(search)} 个视频")
+        return history, search
+
+    # ==================== 榜单长图缓存 ====================
+
+    def get_board_dir(self) -> Path:
+        """获取榜单长图缓存目录"""
+        return self.get_cache_dir() / BOARD_CACHE_DIR_NAME
+
+    def get_board_path(self, ranknum: int, field: str, complete: bool = True, page: int = 1) -> Path:
+        """获取某期某个榜单某一页的长图路径，封面不全时使用临时文件名，下次请求重新绘制"""
+        suffix = ".jpg" if complete else ".partial.jpg"
+        page_part = f"_p{page}" if page > 1 else ""
+        return self.get_board_dir() / f"rank_{ranknum}_{field}{page_part}{suffix}"
+
+    def _cleanup_boards_sync(self, keep: set) -> None:
+        """删除不在热缓存中的期的长图（在工作线程中执行）"""
+        for board_file in self.get_board_dir().glob("rank_*"):
+            try:
+                ranknum = int(board_file.name.split("_")[1])
+            except (IndexError, ValueError):
+                continue
+            if ranknum not in keep:
+                board_file.unlink(missing_ok=True)
 
     # ==================== 封面图片缓存 ====================
 
     def get_cover_cache_dir(self) -> Path:
         """获取封面图片缓存目录"""
-        cover_dir = self.get_cache_dir() / COVER_CACHE_DIR_NAME
-        cover_dir.mkdir(parents=True, exist_ok=True)
-        return cover_dir
+        return self.get_cache_dir() / COVER_CACHE_DIR_NAME
 
     def get_cover_cache_path(self, url: str) -> Path:
         """根据 URL 生成封面图片缓存路径"""
@@ -111,29 +515,191 @@ class CacheManager:
             ext = ".webp"
         return self.get_cover_cache_dir() / f"{url_hash}{ext}"
 
+    @property
+    def cover_generation(self) -> int:
+        """封面文件可能被删除时递增，见 CoverStore.generation"""
+        return self._covers.generation
+
     async def get_cached_cover(self, url: str) -> str:
-        """获取封面图片，优先使用本地缓存，无缓存则下载并保存"""
+        """获取封面图片，优先使用本地缓存，无缓存则下载并保存
+
+        同一 URL 的并发下载会合并为一次
+        """
+        await self._load_manifest()
         cache_path = self.get_cover_cache_path(url)
 
         # 如果缓存存在，直接返回本地路径
-        if cache_path.exists():
+        if self._covers.contains(cache_path.name):
+            self._covers.touch(cache_path.name)
+            path = await self._prefer_thumbnail(cache_path)
+            # 索引可能落后于磁盘：其他实例已淘汰、启动核对尚未完成等
+            if path is not None and await asyncio.to_thread(os.path.exists, path):
+                metrics.inc("cover_cache_hits_total")
+                return path
+            logger.debug(f"封面文件已不存在，重新获取: {cache_path.name}")
+            metrics.inc("cover_cache_missing_total")
+            self._covers.drop(cache_path.name)
+
+        metrics.inc("cover_cache_misses_total")
+        return await self._cover_flight.do(url, lambda: self._fetch_cover(url, cache_path))
+
+    @contextmanager
+    def _busy(self, name: str):
+        """标记封面正在写入，期间清理旧缓存与孤立封面时不会删除它及其缩略图"""
+        stem = Path(name).stem
+        self._busy_covers[stem] += 1
+        try:
+            yield
+        finally:
+            self._busy_covers[stem] -= 1
+            if self._busy_covers[stem] <= 0:
+                del self._busy_covers[stem]
+
+    def _is_busy(self, stem: str) -> bool:
+        """文件名主干为 stem 的封面是否正在下载或生成缩略图（只做单键查询，可在工作线程中调用）"""
+        return self._busy_covers.get(stem, 0) > 0
+
+    async def _fetch_cover(self, url: str, cache_path: Path) -> str:
+        """登记其他实例已下载的封面，没有时再下载"""
+        with self._busy(cache_path.name):
+            size = await asyncio.to_thread(self._existing_size, cache_path)
+            if size:
+                metrics.inc("cover_cache_adopted_total")
+                self._covers.add(cache_path.name, size)
+                await self._enforce_cover_budget()
+                return await self._prefer_thumbnail(cache_path) or url
+            # 封面 CDN 熔断期间不再发起下载，直接使用原始 URL
+            if not self.cover_breaker.allow():
+                return url
+            return await self._download_cover(url, cache_path)
+
+    @staticmethod
+    def _existing_size(path: Path) -> int:
+        """文件存在时返回其大小，否则返回 0"""
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    async def _prefer_thumbnail(self, cache_path: Path) -> Optional[str]:
+        """启用缩略图时返回缩略图路径，首次访问时生成；不可用时返回原图路径
+
+        生成缩略图时发现原图已被删除则返回 None
+        """
+        if self.thumbnails is None or not self.thumbnails.enabled:
+            return str(cache_path.absolute())
+        thumb_name = self._covers.get_thumbnail(cache_path.name, self.thumbnails.spec)
+        if thumb_name is None:
+            thumb_name = await self._cover_flight.do(
+                ("thumb", cache_path.name), lambda: self._make_thumbnail(cache_path)
+            )
+        if thumb_name is None:
+            return None
+        if not thumb_name:
             return str(cache_path.absolute())
+        return str(cache_path.with_name(thumb_name).absolute())
 
-        # 下载并缓存图片
+    async def _make_thumbnail(self, cache_path: Path) -> Optional[str]:
+        """在线程池中生成缩略图并登记到封面存储，返回缩略图文件名
+
+        空字符串表示使用原图，原图已不存在时返回 None 且不做登记
+        """
+        spec = self.thumbnails.spec
+        thumb_name = self.thumbnails.thumbnail_name(cache_path.name)
+        try:
+            with metrics.timer("thumbnail_seconds"), self._busy(cache_path.name):
+                size = await self.thumbnails.render(cache_path, cache_path.with_name(thumb_name))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # 记录为不使用缩略图，避免每次访问都重复解码失败的图片
+            logger.warning(f"生成封面缩略图失败: {e}，使用原图")
+            size = 0
+        if not size:
+            thumb_name = ""
+        self._covers.set_thumbnail(cache_path.name, thumb_name, size, spec)
+        await self._enforce_cover_budget()
+        return thumb_name
+
+    async def resolve_covers(self, urls: Iterable[str], deadline: Optional[float] = None) -> Dict[str, str]:
+        """并发获取一组封面，返回 URL 到本地路径的映射
+
+        并发数受 cover_concurrency 限制；超过总时限仍未完成的封面映射为原始 URL，
+        其下载任务继续在后台完成并写入缓存
+        """
+        if deadline is None:
+            deadline = self.cover_deadline
+        semaphore = asyncio.Semaphore(max(1, self.cover_concurrency))
+
+        async def _resolve(url: str) -> str:
+            async with semaphore:
+                return await self.get_cached_cover(url)
+
+        tasks = {url: asyncio.ensure_future(_resolve(url)) for url in dict.fromkeys(urls)}
+        # 调用方超时或被取消后任务仍会继续，登记下来以便关闭时取消
+        for task in tasks.values():
+            self._cover_tasks.add(task)
+            task.add_done_callback(self._cover_tasks.discard)
+        if not tasks:
+            return {}
+
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        if pending:
+            logger.info(f"{len(pending)} 张封面未在 {deadline}s 内完成，暂时使用原始 URL")
+            metrics.inc("cover_deadline_misses_total", len(pending))
+
+        resolved = {}
+        for url, task in tasks.items():
+            if task in done and task.exception() is None:
+                resolved[url] = task.result()
+            else:
+                resolved[url] = url
+        return resolved
+
+    async def warmup_covers(self, urls: Iterable[str], concurrency: int = DEFAULT_WARMUP_CONCURRENCY) -> int:
+        """后台预热一组封面（无总时限），返回成功缓存到本地的数量"""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _warm(url: str) -> bool:
+            async with semaphore:
+                return await self.get_cached_cover(url) != url
+
+        results = await asyncio.gather(*(_warm(url) for url in dict.fromkeys(urls)))
+        return sum(results)
+
+    async def _download_cover(self, url: str, cache_path: Path) -> str:
+        """下载封面图片并写入缓存，失败时返回原始 URL"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        with open(cache_path, "wb") as f:
-                            f.write(content)
-                        logger.debug(f"已缓存封面图片: {cache_path.name}")
-                        return str(cache_path.absolute())
-                    else:
+            session = self.http_client.session
+            with metrics.timer("cover_download_seconds"):
+                async with session.get(url, timeout=self.http_client.cover_timeout) as response:
+                    if response.status != 200:
                         logger.warning(f"下载封面失败，状态码: {response.status}，使用原始 URL")
+                        metrics.inc("cover_download_failures_total")
+                        # 只有服务端错误说明 CDN 异常，404 等只影响单张封面
+                        if response.status >= 500:
+                            self.cover_breaker.record_failure()
+                        else:
+                            self.cover_breaker.record_success()
                         return url
+                    content = await response.read()
+            self.cover_breaker.record_success()
+            metrics.inc("cover_bytes_downloaded_total", len(content))
+
+            # 在工作线程中原子写入，避免阻塞事件循环或读到写了一半的图片
+            await asyncio.to_thread(atomic_write_bytes, cache_path, content)
+            self._covers.add(cache_path.name, len(content))
+            await self._enforce_cover_budget()
+            logger.debug(f"已缓存封面图片: {cache_path.name}")
+            return await self._prefer_thumbnail(cache_path) or url
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            logger.warning(f"下载封面图片失败: {e}，使用原始 URL")
+            metrics.inc("cover_download_failures_total")
+            self.cover_breaker.record_failure()
+            return url
         except Exception as e:
             logger.warning(f"下载封面图片失败: {e}，使用原始 URL")
+            metrics.inc("cover_download_failures_total")
             return url
 
     # ==================== 封面清理辅助方法 ====================
@@ -141,13 +707,7 @@ class CacheManager:
     def _extract_cover_urls_from_rank(self, rank_data: dict) -> set:
         """从周榜数据中提取所有封面图片 URL"""
         cover_urls = set()
-        # 所有包含视频列表的字段
-        video_list_fields = [
-            "main_rank", "second_rank", "super_hit", "pick_up",
-            "oth_pickup", "Vocaloid_pick_up", "history-1-year",
-            "history-10-year", "ed", "op"
-        ]
-        for field in video_list_fields:
+        for field in VIDEO_LIST_FIELDS:
             videos = rank_data.get(field, [])
             if isinstance(videos, list):
                 for video in videos:
@@ -155,56 +715,85 @@ class CacheManager:
                         cover_urls.add(video["coverurl"])
         return cover_urls
 
-    def _delete_covers_for_rank_file(self, rank_file: Path) -> None:
-        """删除指定周榜文件对应的所有封面图片缓存"""
+    async def _enforce_cover_budget(self) -> None:
+        """封面总大小超出预算时立即淘汰，否则延迟批量保存索引"""
+        if self._covers.total_bytes <= self._covers.max_bytes:
+            self._schedule_index_save()
+            return
+        async with self._lock:
+            evicted = await asyncio.to_thread(self._locked, self._evict_covers_sync)
+        if evicted:
+            logger.info(f"封面缓存超出预算，已淘汰 {len(evicted)} 张最久未使用的封面")
+
+    def _evict_covers_sync(self) -> list:
+        """按字节预算淘汰封面并保存索引（在工作线程中执行）"""
+        evicted = self._covers.evict_over_budget(skip=lambda name: self._is_busy(Path(name).stem))
+        self._covers.save()
+        return evicted
+
+    def _schedule_index_save(self) -> None:
+        """合并短时间内的多次写入，延迟保存封面索引"""
+        if self._index_save_task is None or self._index_save_task.done():
+            self._index_save_task = asyncio.create_task(self._delayed_index_save())
+
+    async def _delayed_index_save(self) -> None:
+        """延迟数秒后保存封面索引"""
+        await asyncio.sleep(COVER_INDEX_SAVE_DELAY)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """立即保存封面索引"""
         try:
-            with open(rank_file, "r", encoding="utf-8") as f:
-                rank_data = json.load(f)
-
-            cover_urls = self._extract_cover_urls_from_rank(rank_data)
-            deleted_count = 0
-
-            for url in cover_urls:
-                cover_path = self.get_cover_cache_path(url)
-                if cover_path.exists():
-                    cover_path.unlink()
-                    deleted_count += 1
-
-            if deleted_count > 0:
-                logger.info(f"已删除 {deleted_count} 张封面图片缓存 (关联: {rank_file.name})")
+            async with self._lock:
+                await asyncio.to_thread(self._locked, self._covers.save)
         except Exception as e:
-            logger.warning(f"清理封面图片缓存失败: {e}")
-
-    def cleanup_orphan_covers(self) -> None:
+            logger.warning(f"保存封面索引失败: {e}")
+
+    async def close(self) -> None:
+        """取消在途的封面下载与延迟保存，随后保存封面索引"""
+        if self._index_save_task is not None:
+            self._index_save_task.cancel()
+            self._index_save_task = None
+        tasks = list(self._cover_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._cover_flight.cancel_all()
+        await self.flush()
+
+    async def cleanup_orphan_covers(self) -> None:
         """清理不属于任何缓存周榜的孤立封面图片"""
+        async with self._lock:
+            await asyncio.to_thread(self._locked, self._cleanup_orphan_covers_sync)
+
+    def _cleanup_orphan_covers_sync(self) -> None:
+        """cleanup_orphan_covers 的同步实现（在工作线程中执行）"""
         try:
-            # 收集所有缓存周榜中的封面 URL 哈希
-            valid_cover_hashes = set()
-            cache_dir = self.get_cache_dir()
-
-            for cache_file in cache_dir.glob("rank_*.json"):
-                try:
-                    with open(cache_file, "r", encoding="utf-8") as f:
-                        rank_data = json.load(f)
-                    cover_urls = self._extract_cover_urls_from_rank(rank_data)
-                    for url in cover_urls:
-                        url_hash = hashlib.md5(url.encode()).hexdigest()
-                        valid_cover_hashes.add(url_hash)
-                except Exception:
-                    continue
+            # 引用计数为零的封面即为孤立封面
+            self._ensure_manifest()
+            valid_cover_files = self._covers.referenced()
+            valid_stems = {Path(name).stem for name in valid_cover_files}
 
             # 删除不在有效列表中的封面图片
             cover_dir = self.get_cover_cache_dir()
             deleted_count = 0
 
             for cover_file in cover_dir.glob("*"):
-                # 提取文件名中的哈希部分
-                file_hash = cover_file.stem
-                if file_hash not in valid_cover_hashes:
-                    cover_file.unlink()
+                # 跳过正在写入的临时文件
+                if cover_file.name.startswith("."):
+                    continue
+                if is_thumbnail(cover_file.name):
+                    # 缩略图随原图保留；原图被删除时缩略图已一并删除，这里只清理无主的缩略图
+                    owner = thumbnail_owner_stem(cover_file.name)
+                    if owner not in valid_stems and not self._is_busy(owner):
+                        cover_file.unlink(missing_ok=True)
+                    continue
+                if cover_file.name not in valid_cover_files and not self._is_busy(cover_file.stem):
+                    self._covers.delete(cover_file.name)
                     deleted_count += 1
 
             if deleted_count > 0:
+                self._covers.save()
                 logger.info(f"已清理 {deleted_count} 张孤立封面图片缓存")
         except Exception as e:
             logger.warning(f"清理孤立封面图片失败: {e}")
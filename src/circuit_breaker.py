@@ -0,0 +1,96 @@
+"""
+熔断器模块 - 上游连续失败时暂停请求，冷却时间按指数增长，避免每次查询都等待超时
+"""
+import time
+
+from astrbot.api import logger
+
+from .constants import (
+    DEFAULT_BREAKER_FAILURE_THRESHOLD,
+    DEFAULT_BREAKER_BASE_COOLDOWN,
+    DEFAULT_BREAKER_MAX_COOLDOWN,
+    BREAKER_TRIAL_TIMEOUT,
+)
+from .metrics import metrics
+
+
+class CircuitBreaker:
+    """熔断器
+
+    - 关闭：正常请求，连续失败达到 failure_threshold 次后打开
+    - 打开：冷却期内拒绝请求，冷却时间从 base_cooldown 起每次翻倍，最多 max_cooldown
+    - 半开：冷却结束后只放行一次试探请求，成功则关闭，失败则以更长的冷却时间重新打开
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_BREAKER_FAILURE_THRESHOLD,
+        base_cooldown: float = DEFAULT_BREAKER_BASE_COOLDOWN,
+        max_cooldown: float = DEFAULT_BREAKER_MAX_COOLDOWN,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max(base_cooldown, max_cooldown)
+        # 连续失败次数与连续打开次数
+        self._failures = 0
+        self._trips = 0
+        # 冷却结束时间（monotonic），0 表示熔断器关闭
+        self._open_until = 0.0
+        # 半开状态下试探请求的开始时间，0 表示没有在途的试探
+        self._trial_at = 0.0
+        metrics.register_gauge(f"breaker_{name}_open_seconds", self.retry_after)
+
+    @property
+    def state(self) -> str:
+        """当前状态：closed / open / half_open"""
+        if not self._open_until:
+            return "closed"
+        if time.monotonic() < self._open_until:
+            return "open"
+        return "half_open"
+
+    def retry_after(self) -> float:
+        """距离冷却结束的秒数，未打开时为 0"""
+        return max(0.0, self._open_until - time.monotonic()) if self._open_until else 0.0
+
+    def allow(self) -> bool:
+        """是否允许发起一次请求"""
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        # 试探请求被取消时不会回报结果，超时后允许新的试探
+        if state == "half_open" and (not self._trial_at or now - self._trial_at > BREAKER_TRIAL_TIMEOUT):
+            self._trial_at = now
+            return True
+        metrics.inc(f"breaker_{self.name}_rejected_total")
+        return False
+
+    def record_success(self) -> None:
+        """请求成功，关闭熔断器"""
+        if self._open_until:
+            logger.info(f"{self.name} 上游已恢复，熔断器关闭")
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._trial_at = 0.0
+
+    def record_failure(self) -> None:
+        """请求失败，达到阈值或试探失败时打开熔断器"""
+        state = self.state
+        if state == "open":
+            # 打开前已发出的请求陆续失败，不再延长冷却
+            return
+        self._trial_at = 0.0
+        if state == "closed":
+            self._failures += 1
+            if self._failures < self.failure_threshold:
+                return
+        self._trips += 1
+        self._failures = 0
+        cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (self._trips - 1))
+        self._open_until = time.monotonic() + cooldown
+        metrics.inc(f"breaker_{self.name}_opened_total")
+        logger.warning(f"{self.name} 上游连续失败，熔断 {cooldown:.0f} 秒")
@@ -9,11 +9,190 @@ FORWARD_SUPPORTED_PLATFORMS = {PlatformAdapterType.AIOCQHTTP}
 # API 地址
 RANK_API_URL = "https://www.evocalrank.com/data/info/latest.json"
 
-# 最大缓存周数
+# HTTP 连接池总连接数
+DEFAULT_HTTP_CONNECTION_LIMIT = 20
+
+# HTTP 连接池单主机连接数
+DEFAULT_HTTP_LIMIT_PER_HOST = 8
+
+# DNS 缓存时间（秒）
+DEFAULT_DNS_CACHE_TTL = 300
+
+# 空闲连接保活时间（秒）
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+
+# 周榜 API 请求超时（秒）
+DEFAULT_API_TIMEOUT = 30
+
+# 封面下载超时（秒）
+DEFAULT_COVER_TIMEOUT = 15
+
+# 所有包含视频列表的字段（JSON 中的原始字段名）
+VIDEO_LIST_FIELDS = (
+    "main_rank", "second_rank", "super_hit", "pick_up",
+    "oth_pickup", "Vocaloid_pick_up", "history-1-year",
+    "history-10-year", "ed", "op",
+)
+
+# 提供查询命令的榜单及其展示名
+RANK_LIST_TITLES = {
+    "main_rank": "主榜",
+    "second_rank": "副榜",
+    "pick_up": "PickUp 榜",
+}
+
+# 所有视频列表的展示名
+VIDEO_LIST_TITLES = {
+    **RANK_LIST_TITLES,
+    "super_hit": "SuperHit 长红榜",
+    "oth_pickup": "其他 PickUp",
+    "Vocaloid_pick_up": "VOCALOID PickUp",
+    "history-1-year": "一年前的今天",
+    "history-10-year": "十年前的今天",
+    "op": "OP",
+    "ed": "ED",
+}
+
+# /v榜 命令中各列表的写法（不区分大小写，也可直接使用字段名），第一个写法用于提示
+LIST_ALIASES = {
+    "main_rank": ("主榜", "main"),
+    "second_rank": ("副榜", "second"),
+    "pick_up": ("pickup",),
+    "super_hit": ("长红", "superhit"),
+    "oth_pickup": ("其他pickup", "othpickup"),
+    "Vocaloid_pick_up": ("vpickup", "vocaloidpickup"),
+    "history-1-year": ("一年前", "1年前"),
+    "history-10-year": ("十年前", "10年前"),
+    "op": ("op",),
+    "ed": ("ed",),
+}
+
+# 榜单每页的视频条目数
+LIST_PAGE_SIZE = 10
+
+# 状态命令中展示的耗时指标
+STATUS_LATENCY_LABELS = {
+    "api_fetch_seconds": "API 请求",
+    "cache_load_seconds": "读取缓存",
+    "cover_download_seconds": "封面下载",
+    "thumbnail_seconds": "缩略图",
+    "render_list_seconds": "渲染榜单",
+    "render_board_seconds": "绘制长图",
+    "build_forward_seconds": "构建转发",
+    "reply_prepare_seconds": "回复准备",
+    "send_throttle_seconds": "限速等待",
+}
+
+# 指标导出到文件的间隔（秒）
+METRICS_DUMP_INTERVAL = 60
+
+# 预渲染榜单消息的缓存条目数
+RENDER_CACHE_SIZE = 32
+
+# 各平台非合并转发发送限制：(会话每秒条数, 会话突发条数, 平台每秒总条数(0 不限), 单条消息链合并的视频数)
+PLATFORM_SEND_LIMITS = {
+    "telegram": (1.0, 3, 25, 1),
+    "discord": (1.0, 5, 40, 5),
+    "qq_official": (1.0, 5, 0, 1),
+    "lark": (2.0, 5, 0, 5),
+    "slack": (1.0, 3, 0, 5),
+    "dingtalk": (0.3, 3, 0, 1),
+    "wecom": (1.0, 3, 0, 1),
+}
+
+# 未列出平台的发送限制，与原先每条间隔 0.5 秒相当
+DEFAULT_SEND_LIMIT = (2.0, 3, 0, 1)
+
+# 空闲会话令牌桶的回收间隔（秒）
+SEND_BUCKET_IDLE_TTL = 10 * 60
+
+# 榜单输出模式：auto 合并转发/多条消息，image 始终发送长图，image_fallback 仅在不支持合并转发时发送长图
+OUTPUT_MODES = ("auto", "image", "image_fallback")
+DEFAULT_OUTPUT_MODE = "auto"
+
+# 榜单长图使用的中文字体查找位置
+BOARD_FONT_CANDIDATES = (
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/wenquanyi/wqy-microhei/wqy-microhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+)
+
+# 封面并发下载数
+DEFAULT_COVER_CONCURRENCY = 5
+
+# 单条榜单消息等待封面的总时限（秒）
+DEFAULT_COVER_DEADLINE = 8
+
+# 封面缓存总大小上限（MB）
+DEFAULT_COVER_CACHE_MAX_MB = 200
+
+# 封面索引延迟保存时间（秒），合并短时间内的多次写入
+COVER_INDEX_SAVE_DELAY = 5
+
+# 封面缩略图最长边（像素）
+DEFAULT_THUMBNAIL_MAX_EDGE = 480
+
+# 封面缩略图编码质量（1-100）
+DEFAULT_THUMBNAIL_QUALITY = 75
+
+# 封面缩略图格式（webp 或 jpeg）
+DEFAULT_THUMBNAIL_FORMAT = "jpeg"
+
+# 缩略图生成线程数
+DEFAULT_THUMBNAIL_WORKERS = 2
+
+# 新一期预热时的封面并发下载数
+DEFAULT_WARMUP_CONCURRENCY = 4
+
+# 周榜发布周期（秒）
+RELEASE_INTERVAL = 7 * 24 * 60 * 60
+
+# 到达预计发布时间后首次轮询的间隔（秒）
+DEFAULT_POLL_INTERVAL = 5 * 60
+
+# 轮询退避的最大间隔（秒）
+DEFAULT_MAX_POLL_INTERVAL = 2 * 60 * 60
+
+# 内存快照默认刷新间隔（秒）
+DEFAULT_SNAPSHOT_TTL = 10 * 60
+
+# 快照过期后等待后台刷新的时长（秒），超时先返回旧快照
+DEFAULT_STALE_GRACE = 2
+
+# 熔断器：连续失败多少次后打开
+DEFAULT_BREAKER_FAILURE_THRESHOLD = 3
+
+# 熔断器首次冷却时间（秒），之后每次打开翻倍
+DEFAULT_BREAKER_BASE_COOLDOWN = 30
+
+# 熔断器最长冷却时间（秒）
+DEFAULT_BREAKER_MAX_COOLDOWN = 30 * 60
+
+# 半开状态下试探请求的最长等待时间（秒），超时后允许新的试探
+BREAKER_TRIAL_TIMEOUT = 60
+
+# 主实例租约有效期（秒），主实例异常退出后其他实例最多等待这么久接任
+DEFAULT_LEADER_LEASE_TTL = 60
+
+# 续约租约与检查其他实例缓存更新的间隔（秒）
+DEFAULT_CACHE_SYNC_INTERVAL = 10
+
+# 热缓存默认保留期数（完整数据 + 封面）
 MAX_CACHE_COUNT = 10
 
+# 冷存储默认保留期数（仅指标，0 表示不限）
+DEFAULT_ARCHIVE_MAX_ISSUES = 520
+
 # 缓存目录名
 CACHE_DIR_NAME = "vocaloid_cache"
 
 # 封面图片缓存子目录
 COVER_CACHE_DIR_NAME = "covers"
+
+# 榜单长图缓存子目录
+BOARD_CACHE_DIR_NAME = "boards"
@@ -0,0 +1,344 @@
+"""
+封面存储模块 - 按引用计数与字节预算管理封面图片缓存
+"""
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from astrbot.api import logger
+
+from .thumbnail import is_thumbnail, thumbnail_owner_stem
+from .utils import atomic_write_bytes
+
+
+class CoverStore:
+    """封面图片内容存储
+
+    - 引用计数：记录每张封面被多少个已缓存期引用，跨期共享的封面不会随旧期一起删除
+    - 字节预算：总大小超过 max_bytes 时按最近最少使用淘汰，优先淘汰未被引用的封面
+
+    缩略图作为原图条目的附属记录，计入字节预算并随原图一起淘汰
+
+    索引只在新增/淘汰时落盘，访问时间的更新仅保存在内存中；
+    多个实例共享缓存目录时，保存前先合并其他实例写入的条目（调用方持有文件锁）
+
+    事件循环（访问、新增）与工作线程（保存、淘汰、清理）会同时修改条目，
+    读写条目的方法都持有内部线程锁；落盘时只在锁内序列化，写文件不占用锁
+    """
+
+    def __init__(self, cover_dir: Path, index_path: Path, max_bytes: int):
+        self.cover_dir = cover_dir
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        # 文件名 -> {"size": 字节数, "atime": 最近访问时间, "thumb": 缩略图信息（可选）}，按访问顺序排列
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._refcounts: Counter = Counter()
+        self._total_bytes = 0
+        self._loaded = False
+        # 上次保存以来本实例新增/删除的封面，合并磁盘索引时以本实例的修改为准
+        self._added: set = set()
+        self._deleted: set = set()
+        self._mutex = threading.RLock()
+        # 封面或缩略图文件可能被删除时递增
+        self._generation = 0
+
+    @property
+    def loaded(self) -> bool:
+        """索引是否已加载"""
+        return self._loaded
+
+    @property
+    def total_bytes(self) -> int:
+        """当前封面总字节数"""
+        return self._total_bytes
+
+    @property
+    def generation(self) -> int:
+        """删除封面、替换缩略图或发现文件丢失时递增，调用方据此判断记下的本地路径是否需要重新核对"""
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ==================== 索引持久化 ====================
+
+    def load(self, refcounts: Counter, verify: bool = True) -> None:
+        """加载索引并设置初始引用计数，索引缺失时扫描目录重建（在工作线程中执行）
+
+        verify 为 False 时不逐个检查文件是否存在，由调用方稍后通过 verify() 核对
+        """
+        with self._mutex:
+            self._refcounts = Counter(refcounts)
+            self._generation += 1
+            self._entries.clear()
+            self._added.clear()
+            self._deleted.clear()
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                for name, entry in sorted(entries.items(), key=lambda item: item[1].get("atime", 0)):
+                    self._entries[name] = entry
+            except FileNotFoundError:
+                verify = False
+                self._scan_dir()
+            except Exception as e:
+                logger.warning(f"读取封面索引失败，重新扫描: {e}")
+                verify = False
+                self._scan_dir()
+            self._total_bytes = sum(self._entry_bytes(entry) for entry in self._entries.values())
+            if verify:
+                self.verify()
+            self._loaded = True
+
+    @staticmethod
+    def _entry_bytes(entry: dict) -> int:
+        """原图与缩略图的总字节数"""
+        thumb = entry.get("thumb")
+        return entry["size"] + (thumb["size"] if thumb else 0)
+
+    def _scan_dir(self) -> None:
+        """扫描封面目录，以文件修改时间作为初始访问时间"""
+        files = []
+        thumbs = {}
+        for cover_file in self.cover_dir.glob("*"):
+            if cover_file.name.startswith(".") or not cover_file.is_file():
+                continue
+            stat = cover_file.stat()
+            if is_thumbnail(cover_file.name):
+                thumbs[thumbnail_owner_stem(cover_file.name)] = (cover_file.name, stat.st_size)
+                continue
+            files.append((stat.st_mtime, cover_file.name, stat.st_size))
+        for mtime, name, size in sorted(files):
+            self._entries[name] = {"size": size, "atime": int(mtime)}
+            thumb = thumbs.get(Path(name).stem)
+            if thumb is not None:
+                # 生成参数未知，下次访问时按当前参数重新生成
+                self._entries[name]["thumb"] = {"name": thumb[0], "size": thumb[1], "spec": ""}
+
+    def verify(self) -> int:
+        """移除文件已不存在的条目与缩略图记录，返回移除的封面数（在工作线程中执行）"""
+        with self._mutex:
+            entries = list(self._entries.items())
+        # 逐个 stat 不持有锁，只在移除时加锁
+        missing = 0
+        for name, entry in entries:
+            thumb = entry.get("thumb")
+            if not (self.cover_dir / name).exists():
+                with self._mutex:
+                    if self._entries.get(name) is entry:
+                        del self._entries[name]
+                        self._total_bytes -= self._entry_bytes(entry)
+                        self._generation += 1
+                        missing += 1
+            elif thumb and thumb["name"] and not (self.cover_dir / thumb["name"]).exists():
+                with self._mutex:
+                    if entry.get("thumb") is thumb:
+                        del entry["thumb"]
+                        self._total_bytes -= thumb["size"]
+                        self._generation += 1
+        return missing
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取封面索引失败: {e}")
+            return {}
+
+    def merge_from_disk(self) -> None:
+        """合并其他实例写入磁盘索引的修改（在工作线程中执行）
+
+        - 磁盘上有、内存中没有的条目：其他实例新下载的封面，加入内存
+        - 内存中有、磁盘上没有且文件已不存在的条目：其他实例已淘汰，从内存移除
+        - 两边都有的条目：取较新的访问时间
+        """
+        on_disk = self._read_index()
+        with self._mutex:
+            self._merge(on_disk)
+
+    def _merge(self, on_disk: dict) -> None:
+        """merge_from_disk 的实现（需持有线程锁）"""
+        adopted = False
+        for name, entry in on_disk.items():
+            if name in self._deleted:
+                continue
+            mine = self._entries.get(name)
+            if mine is None:
+                self._entries[name] = entry
+                self._total_bytes += self._entry_bytes(entry)
+                adopted = True
+            elif entry.get("atime", 0) > mine.get("atime", 0):
+                mine["atime"] = entry["atime"]
+                adopted = True
+        for name in [name for name in self._entries if name not in on_disk and name not in self._added]:
+            if not self.path_for(name).exists():
+                self._total_bytes -= self._entry_bytes(self._entries.pop(name))
+                self._generation += 1
+        if adopted:
+            self._entries = OrderedDict(sorted(self._entries.items(), key=lambda item: item[1].get("atime", 0)))
+
+    def save(self) -> None:
+        """合并磁盘上的索引后原子写入（在工作线程中执行）"""
+        on_disk = self._read_index()
+        with self._mutex:
+            self._merge(on_disk)
+            content = json.dumps(self._entries).encode("utf-8")
+            added, self._added = self._added, set()
+            deleted, self._deleted = self._deleted, set()
+        try:
+            atomic_write_bytes(self.index_path, content)
+        except BaseException:
+            # 未能落盘的修改留到下次保存时合并
+            with self._mutex:
+                self._added |= added - self._deleted
+                self._deleted |= deleted - self._added
+            raise
+
+    def set_refcounts(self, refcounts: Counter) -> None:
+        """按重新加载的清单重置引用计数"""
+        with self._mutex:
+            self._refcounts = Counter(refcounts)
+
+    # ==================== 访问与写入 ====================
+
+    def path_for(self, name: str) -> Path:
+        """获取封面文件路径"""
+        return self.cover_dir / name
+
+    def contains(self, name: str) -> bool:
+        """检查封面是否已缓存"""
+        return name in self._entries
+
+    def touch(self, name: str) -> None:
+        """记录一次访问，更新 LRU 顺序"""
+        with self._mutex:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry["atime"] = int(time.time())
+                self._entries.move_to_end(name)
+
+    def add(self, name: str, size: int) -> None:
+        """登记一张新写入的封面"""
+        with self._mutex:
+            old = self._entries.pop(name, None)
+            if old is not None:
+                self._total_bytes -= self._entry_bytes(old)
+                self._unlink_thumbnail(old)
+            self._entries[name] = {"size": size, "atime": int(time.time())}
+            self._total_bytes += size
+            self._added.add(name)
+            self._deleted.discard(name)
+
+    def get_thumbnail(self, name: str, spec: str) -> Optional[str]:
+        """获取按 spec 生成的缩略图文件名
+
+        返回 None 表示尚未生成（或参数已变化），空字符串表示原图已足够小、直接使用原图
+        """
+        entry = self._entries.get(name)
+        thumb = entry.get("thumb") if entry is not None else None
+        if thumb is None or thumb["spec"] != spec:
+            return None
+        return thumb["name"]
+
+    def set_thumbnail(self, name: str, thumb_name: str, size: int, spec: str) -> None:
+        """登记原图的缩略图，thumb_name 为空表示不需要缩略图"""
+        with self._mutex:
+            entry = self._entries.get(name)
+            if entry is None:
+                return
+            old = entry.get("thumb")
+            if old is not None:
+                self._total_bytes -= old["size"]
+                if old["name"] and old["name"] != thumb_name:
+                    self._unlink_thumbnail(entry)
+            entry["thumb"] = {"name": thumb_name, "size": size, "spec": spec}
+            self._total_bytes += size
+
+    def _unlink_thumbnail(self, entry: dict) -> None:
+        """删除条目附带的缩略图文件"""
+        thumb = entry.get("thumb")
+        if thumb and thumb["name"]:
+            self._generation += 1
+            path = self.path_for(thumb["name"])
+            if path.exists():
+                path.unlink()
+
+    def drop(self, name: str) -> None:
+        """移除文件已丢失的条目，不删除磁盘上的文件，之后可重新登记"""
+        with self._mutex:
+            entry = self._entries.pop(name, None)
+            if entry is not None:
+                self._total_bytes -= self._entry_bytes(entry)
+                self._generation += 1
+            self._deleted.add(name)
+            self._added.discard(name)
+
+    def delete(self, name: str) -> bool:
+        """删除封面文件、缩略图及其索引条目"""
+        with self._mutex:
+            entry = self._entries.pop(name, None)
+            if entry is not None:
+                self._total_bytes -= self._entry_bytes(entry)
+                self._unlink_thumbnail(entry)
+            self._deleted.add(name)
+            self._added.discard(name)
+            self._generation += 1
+        path = self.path_for(name)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
+
+    # ==================== 引用计数 ====================
+
+    def retain(self, names: Iterable[str]) -> None:
+        """一期缓存引用了这些封面"""
+        with self._mutex:
+            self._refcounts.update(names)
+
+    def release(self, names: Iterable[str]) -> List[str]:
+        """一期缓存不再引用这些封面，返回引用计数归零的封面"""
+        released = []
+        with self._mutex:
+            for name in names:
+                self._refcounts[name] -= 1
+                if self._refcounts[name] <= 0:
+                    del self._refcounts[name]
+                    released.append(name)
+        return released
+
+    def referenced(self) -> set:
+        """返回所有被引用的封面文件名"""
+        with self._mutex:
+            return set(self._refcounts)
+
+    # ==================== 淘汰 ====================
+
+    def evict_over_budget(self, skip: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """总大小超过预算时按 LRU 淘汰，先淘汰未被引用的封面，再淘汰被引用的
+
+        skip 返回 True 的封面本次不淘汰
+        """
+        with self._mutex:
+            if self._total_bytes <= self.max_bytes:
+                return []
+
+            ordered = list(self._entries)
+            candidates = [name for name in ordered if name not in self._refcounts]
+            candidates += [name for name in ordered if name in self._refcounts]
+
+            evicted = []
+            for name in candidates:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                if skip is not None and skip(name):
+                    continue
+                self.delete(name)
+                evicted.append(name)
+        return evicted
@@ -0,0 +1,97 @@
+"""
+文件锁模块 - 多个 AstrBot 实例共享同一缓存目录时，用建议性文件锁串行化对缓存的修改
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Windows 下加锁失败后的重试间隔（秒）
+LOCK_RETRY_INTERVAL = 0.05
+
+
+class FileLock:
+    """跨进程的排他文件锁（POSIX 使用 flock，Windows 使用 msvcrt.locking）
+
+    只在工作线程中使用；同一进程内的多个线程先通过线程锁排队，此锁不可重入
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """加锁，blocking 为 False 时锁被占用立即返回 False"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            fd = self._open_locked(blocking)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        if fd is None:
+            self._thread_lock.release()
+            return False
+        self._fd = fd
+        return True
+
+    def _open_locked(self, blocking: bool) -> Optional[int]:
+        """打开锁文件并加锁，锁被占用且不阻塞时返回 None"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if self._lock_fd(fd, blocking):
+                return fd
+        except BaseException:
+            os.close(fd)
+            raise
+        os.close(fd)
+        return None
+
+    @staticmethod
+    def _lock_fd(fd: int, blocking: bool) -> bool:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                return False
+        # msvcrt 的阻塞模式只重试 10 秒，这里自行循环
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(LOCK_RETRY_INTERVAL)
+
+    def release(self) -> None:
+        """解锁并关闭文件"""
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,137 @@
+"""
+历史索引模块 - 基于所有已缓存期构建的跨期视频索引
+"""
+import bisect
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class HistoryEntry(NamedTuple):
+    """视频在某一期某个榜单中的一条记录"""
+    ranknum: int
+    field: str
+    rank: Optional[int]
+    play: int
+    point: int
+    like: int
+    favorite: int
+    coin: int
+    super_hit_times: Optional[int]
+
+
+def normalize_avid(avid: str) -> str:
+    """统一 avid 格式，兼容 "av123" 与 "123" 两种写法"""
+    avid = str(avid).strip()
+    if avid[:2].lower() == "av":
+        avid = avid[2:]
+    return avid
+
+
+class IssueIndex:
+    """跨期视频索引：avid -> 按期号排序的 [HistoryEntry]
+
+    由 CacheManager 在首次查询时一次性构建，此后随每次保存/淘汰增量更新
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, List[HistoryEntry]] = {}
+        self._titles: Dict[str, Tuple[int, str]] = {}
+        # 期号 -> 该期出现的 avid，用于淘汰时只触及相关条目
+        self._issue_avids: Dict[int, Set[str]] = {}
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        """索引是否已构建"""
+        return self._loaded
+
+    def mark_loaded(self) -> None:
+        """标记索引已完成全量构建"""
+        self._loaded = True
+
+    @property
+    def issues(self) -> List[int]:
+        """已索引的期号（从旧到新）"""
+        return sorted(self._issue_avids)
+
+    # ==================== 增量维护 ====================
+
+    def add_issue(self, ranknum: int, lists: Dict[str, Iterable[dict]]) -> None:
+        """索引一期数据，lists 为原始字段名到视频字典列表的映射"""
+        if ranknum in self._issue_avids:
+            self.remove_issue(ranknum)
+        avids = self._issue_avids[ranknum] = set()
+
+        for field, videos in lists.items():
+            for position, video in enumerate(videos, start=1):
+                avid = video.get("avid")
+                if avid is None:
+                    continue
+                avid = normalize_avid(avid)
+                avids.add(avid)
+                rank = video.get("rank")
+                entry = HistoryEntry(
+                    ranknum=ranknum,
+                    field=field,
+                    # super_hit 等列表的 rank 为字符串，使用列表内位置
+                    rank=rank if isinstance(rank, int) else position,
+                    play=video.get("play") or 0,
+                    point=video.get("point") or 0,
+                    like=video.get("like") or 0,
+                    favorite=video.get("favorite") or 0,
+                    coin=video.get("coin") or 0,
+                    super_hit_times=video.get("superHit_times"),
+                )
+                bisect.insort(self._entries.setdefault(avid, []), entry)
+
+                title = self._titles.get(avid)
+                if title is None or title[0] <= ranknum:
+                    self._titles[avid] = (ranknum, video.get("title", ""))
+
+    def remove_issue(self, ranknum: int) -> None:
+        """从索引中移除一期"""
+        for avid in self._issue_avids.pop(ranknum, ()):
+            remaining = [entry for entry in self._entries[avid] if entry.ranknum != ranknum]
+            if remaining:
+                self._entries[avid] = remaining
+            else:
+                del self._entries[avid]
+                self._titles.pop(avid, None)
+
+    # ==================== 查询 ====================
+
+    def title(self, avid: str) -> Optional[str]:
+        """视频最近一次出现时的标题"""
+        title = self._titles.get(normalize_avid(avid))
+        return title[1] if title else None
+
+    def trajectory(self, avid: str) -> List[HistoryEntry]:
+        """视频在各期各榜单中的记录，按期号排序"""
+        return list(self._entries.get(normalize_avid(avid), []))
+
+    def play_growth(self, avid: str) -> List[Tuple[int, int, Optional[int]]]:
+        """视频每期的播放量及较上一次出现时的增长：[(期号, 播放量, 增长)]"""
+        per_issue: Dict[int, int] = {}
+        for entry in self._entries.get(normalize_avid(avid), []):
+            per_issue[entry.ranknum] = max(per_issue.get(entry.ranknum, 0), entry.play)
+
+        growth = []
+        previous = None
+        for ranknum in sorted(per_issue):
+            play = per_issue[ranknum]
+            growth.append((ranknum, play, None if previous is None else play - previous))
+            previous = play
+        return growth
+
+    def longest_super_hits(self, limit: int = 10) -> List[Tuple[str, str, int, int]]:
+        """SuperHit 次数最多的视频：[(avid, 标题, 次数, 最近出现期号)]"""
+        best: Dict[str, Tuple[int, int]] = {}
+        for avid, entries in self._entries.items():
+            for entry in entries:
+                if entry.super_hit_times is None:
+                    continue
+                times, _ = best.get(avid, (0, 0))
+                if entry.super_hit_times >= times:
+                    best[avid] = (entry.super_hit_times, entry.ranknum)
+
+        ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [(avid, self.title(avid) or "", times, ranknum) for avid, (times, ranknum) in ranked]
@@ -0,0 +1,68 @@
+"""
+HTTP 客户端模块 - 插件生命周期内共享的连接池
+"""
+from typing import Optional
+
+import aiohttp
+
+from astrbot.api import logger
+
+from .constants import (
+    DEFAULT_HTTP_CONNECTION_LIMIT,
+    DEFAULT_HTTP_LIMIT_PER_HOST,
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_API_TIMEOUT,
+    DEFAULT_COVER_TIMEOUT,
+)
+
+
+class HttpClient:
+    """共享的 aiohttp 会话，复用连接以省去每次请求的 DNS/TCP/TLS 握手"""
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_HTTP_CONNECTION_LIMIT,
+        limit_per_host: int = DEFAULT_HTTP_LIMIT_PER_HOST,
+        dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        api_timeout: float = DEFAULT_API_TIMEOUT,
+        cover_timeout: float = DEFAULT_COVER_TIMEOUT,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.api_timeout = aiohttp.ClientTimeout(total=api_timeout)
+        self.cover_timeout = aiohttp.ClientTimeout(total=cover_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._closed = False
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """获取共享会话，未启动时自动创建；close() 之后不再创建新会话，抛出 RuntimeError"""
+        if self._closed:
+            raise RuntimeError("HTTP 连接池已关闭")
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def start(self) -> None:
+        """创建共享会话，关闭后再次调用会重新启用"""
+        self._closed = False
+        _ = self.session
+        logger.debug("HTTP 连接池已创建")
+
+    async def close(self) -> None:
+        """关闭共享会话及其连接池，之后的请求直接失败而不会创建新会话"""
+        self._closed = True
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.debug("HTTP 连接池已关闭")
+        self._session = None
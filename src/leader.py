@@ -0,0 +1,87 @@
+"""
+主实例选举模块 - 多个实例共享缓存目录时，通过租约文件选出唯一负责定时刷新与封面预热的实例
+"""
+import json
+import os
+import socket
+import time
+import uuid
+from pathlib import Path
+
+from astrbot.api import logger
+
+from .constants import DEFAULT_LEADER_LEASE_TTL
+from .file_lock import FileLock
+from .metrics import metrics
+from .utils import atomic_write_bytes
+
+
+class LeaderLease:
+    """基于租约文件的主实例选举
+
+    租约记录持有者与到期时间，持有者需在到期前续约；持有者退出时释放租约，
+    异常退出时其他实例在租约到期后接任。读写租约文件时持有文件锁，
+    方法均为同步实现，需在工作线程中调用
+    """
+
+    def __init__(self, path: Path, ttl: float = DEFAULT_LEADER_LEASE_TTL):
+        self.path = path
+        # 与缓存修改使用不同的锁文件，续约不必等待耗时的缓存写入
+        self.lock = FileLock(path.with_name(f".{path.stem}.lock"))
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._is_leader = False
+        # 尚未参与选举时既不是主实例也不是从实例
+        self._elected = False
+        metrics.register_gauge("leader", lambda: int(self._is_leader))
+
+    @property
+    def is_leader(self) -> bool:
+        """最近一次续约后是否为主实例"""
+        return self._is_leader
+
+    @property
+    def is_follower(self) -> bool:
+        """已参与选举且其他实例持有租约"""
+        return self._elected and not self._is_leader
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取主实例租约失败: {e}")
+            return {}
+
+    def try_acquire(self) -> bool:
+        """租约空闲、已过期或本实例持有时获取/续约，返回本实例是否为主实例"""
+        with self.lock:
+            lease = self._read()
+            now = time.time()
+            if lease.get("owner") in (None, self.owner) or lease.get("expires_at", 0) <= now:
+                content = json.dumps({"owner": self.owner, "expires_at": now + self.ttl}).encode("utf-8")
+                atomic_write_bytes(self.path, content)
+                leader = True
+            else:
+                leader = False
+        if not self._elected or leader != self._is_leader:
+            if leader:
+                logger.info(f"本实例成为主实例: {self.owner}")
+            else:
+                logger.info(f"主实例为 {lease.get('owner')}，本实例只读取共享缓存")
+            metrics.inc("leader_changes_total")
+        self._is_leader = leader
+        self._elected = True
+        return leader
+
+    def release(self) -> None:
+        """本实例持有租约时释放，其他实例可立即接任"""
+        self._elected = False
+        if not self._is_leader:
+            return
+        self._is_leader = False
+        with self.lock:
+            if self._read().get("owner") == self.owner:
+                self.path.unlink(missing_ok=True)
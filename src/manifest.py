@@ -0,0 +1,124 @@
+"""
+缓存清单模块 - 记录已缓存的每一期及其封面引用，避免反复扫描缓存目录
+"""
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from astrbot.api import logger
+
+from .utils import atomic_write_bytes
+
+MANIFEST_VERSION = 1
+
+
+class CacheManifest:
+    """周榜缓存清单
+
+    以期号为键记录缓存文件名、时间戳、文件大小与封面哈希，
+    由 CacheManager 在保存/清理缓存时同步维护（非线程安全，调用方负责加锁）
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.generation = 0
+        self.issues: Dict[int, dict] = {}
+        self._latest: Optional[int] = None
+        self._loaded = False
+        # 最近一次读写时清单文件的 (inode, mtime, size)，用于发现其他实例的更新
+        self._stat: Optional[tuple] = None
+
+    @property
+    def loaded(self) -> bool:
+        """清单是否已加载到内存"""
+        return self._loaded
+
+    def load(self) -> bool:
+        """从磁盘加载清单，文件不存在或损坏时返回 False"""
+        self._loaded = True
+        self.issues = {}
+        self._latest = None
+        self._stat = self._read_stat()
+        if self._stat is None:
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return False
+            self.generation = data.get("generation", 0)
+            self.issues = {int(ranknum): entry for ranknum, entry in data.get("issues", {}).items()}
+            self._latest = max(self.issues) if self.issues else None
+            return True
+        except Exception as e:
+            logger.warning(f"读取缓存清单失败: {e}")
+            return False
+
+    def save(self) -> None:
+        """递增版本号并原子写入清单"""
+        self.generation += 1
+        data = {
+            "version": MANIFEST_VERSION,
+            "generation": self.generation,
+            "issues": {str(ranknum): entry for ranknum, entry in sorted(self.issues.items())},
+        }
+        atomic_write_bytes(self.path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        self._stat = self._read_stat()
+
+    def _read_stat(self) -> Optional[tuple]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def changed_on_disk(self) -> bool:
+        """清单文件是否已被其他实例更新（只做一次 stat，不读取内容）"""
+        return self._loaded and self._read_stat() != self._stat
+
+    def add_issue(
+        self,
+        ranknum: int,
+        file_name: str,
+        size: int,
+        generate_timestamp: Optional[int],
+        cover_hashes: Iterable[str],
+    ) -> None:
+        """登记一期缓存"""
+        self.issues[ranknum] = {
+            "file": file_name,
+            "size": size,
+            "generate_timestamp": generate_timestamp,
+            "saved_at": int(time.time()),
+            "covers": sorted(set(cover_hashes)),
+        }
+        if self._latest is None or ranknum > self._latest:
+            self._latest = ranknum
+
+    def remove_issue(self, ranknum: int) -> Optional[dict]:
+        """移除一期缓存记录并返回其条目"""
+        entry = self.issues.pop(ranknum, None)
+        if ranknum == self._latest:
+            self._latest = max(self.issues) if self.issues else None
+        return entry
+
+    def get_issue(self, ranknum: int) -> Optional[dict]:
+        """获取指定期号的条目"""
+        return self.issues.get(ranknum)
+
+    def latest_ranknum(self) -> Optional[int]:
+        """返回期号最大的一期"""
+        return self._latest
+
+    def ranknums(self) -> List[int]:
+        """按期号从旧到新返回所有已缓存期号"""
+        return sorted(self.issues)
+
+    def cover_refcounts(self) -> Counter:
+        """统计每个封面哈希被多少期引用"""
+        counts: Counter = Counter()
+        for entry in self.issues.values():
+            counts.update(entry.get("covers", []))
+        return counts
@@ -2,22 +2,76 @@
 消息构建模块 - 处理榜单消息的构建和发送
 """
 import asyncio
-from typing import List
+import copy
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 
 import astrbot.api.message_components as Comp
 from astrbot.api.message_components import Nodes
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api import logger
 
-from .types import VideoItem
+from .constants import (
+    RANK_LIST_TITLES,
+    VIDEO_LIST_TITLES,
+    VIDEO_LIST_FIELDS,
+    LIST_ALIASES,
+    LIST_PAGE_SIZE,
+    RENDER_CACHE_SIZE,
+    OUTPUT_MODES,
+    DEFAULT_OUTPUT_MODE,
+    STATUS_LATENCY_LABELS,
+)
+from .types import VideoCard, RankSnapshot
+from .history import IssueIndex
 from .cache import CacheManager
+from .singleflight import SingleFlight
+from .send_scheduler import SendScheduler
+from .board import BoardRenderer, BoardRow
+from .metrics import metrics
+
+
+class RenderedList:
+    """一期某个榜单预先渲染好的消息内容"""
+
+    __slots__ = ("header", "items", "complete", "cover_paths", "generation")
+
+    def __init__(self, header: str, items: List[List], complete: bool, cover_paths: List[str], generation: int):
+        self.header = header
+        # 每个视频一条消息链：[封面图片, 文本]，无封面时只有文本
+        self.items = items
+        # 所有封面均已缓存到本地；否则下次请求时重新渲染以换上本地封面
+        self.complete = complete
+        # 引用的本地封面文件，及确认这些文件存在时的封面缓存代数
+        self.cover_paths = cover_paths
+        self.generation = generation
 
 
 class MessageBuilder:
     """消息构建器，负责构建榜单消息"""
 
-    def __init__(self, cache_manager: CacheManager):
+    def __init__(
+        self,
+        cache_manager: CacheManager,
+        send_scheduler: Optional[SendScheduler] = None,
+        board_renderer: Optional[BoardRenderer] = None,
+        output_mode: str = DEFAULT_OUTPUT_MODE,
+    ):
         self.cache_manager = cache_manager
+        self.send_scheduler = send_scheduler or SendScheduler()
+        self.board_renderer = board_renderer
+        if output_mode not in OUTPUT_MODES:
+            logger.warning(f"未知的输出模式 {output_mode}，使用 {DEFAULT_OUTPUT_MODE}")
+            output_mode = DEFAULT_OUTPUT_MODE
+        self.output_mode = output_mode
+        metrics.register_gauge("render_cache_entries", lambda: len(self._render_cache))
+        # (期号, 列表字段名, 页码) -> 渲染结果；合并转发与多条消息共用同一份内容
+        self._render_cache: "OrderedDict[Tuple[int, str, int], RenderedList]" = OrderedDict()
+        self._render_flight = SingleFlight()
+        # 后台预取下一页的任务，保留引用避免被回收
+        self._prefetch_tasks: set = set()
 
     @staticmethod
     def format_num(n: int) -> str:
@@ -26,8 +80,71 @@ class MessageBuilder:
             return f"{n / 10000:.1f}万"
         return str(n)
 
-    async def build_video_content(self, video: VideoItem, rank: int) -> List:
-        """构建单个视频的消息内容（异步，支持封面缓存）"""
+    @staticmethod
+    def get_rank_name(data: RankSnapshot, field: str) -> str:
+        """获取榜单展示名，如 "主榜 (第123期)" """
+        return f"{VIDEO_LIST_TITLES.get(field, field)} (第{data.ranknum}期)"
+
+    # ==================== 分页 ====================
+
+    @staticmethod
+    def resolve_list(name: str) -> Optional[str]:
+        """将 /v榜 命令中的列表名解析为字段名，无法识别时返回 None"""
+        key = name.strip().lower().replace(" ", "")
+        for field in VIDEO_LIST_FIELDS:
+            if key == field.lower() or key in LIST_ALIASES.get(field, ()):
+                return field
+        return None
+
+    @staticmethod
+    def list_alias(field: str) -> str:
+        """列表在 /v榜 命令中的推荐写法"""
+        return LIST_ALIASES.get(field, (field,))[0]
+
+    @staticmethod
+    def page_count(data: RankSnapshot, field: str) -> int:
+        """列表的总页数，空列表为 0"""
+        return -(-len(data.get_cards(field)) // LIST_PAGE_SIZE)
+
+    @staticmethod
+    def _page_slice(data: RankSnapshot, field: str, page: int) -> Tuple[int, List[VideoCard]]:
+        """返回某一页第一条的名次与该页的视频"""
+        start = (page - 1) * LIST_PAGE_SIZE
+        return start + 1, data.get_cards(field)[start:start + LIST_PAGE_SIZE]
+
+    def build_list_usage(self, data: Optional[RankSnapshot]) -> str:
+        """构建 /v榜 的用法说明，列出各列表的写法与条目数"""
+        lines = ["用法: /v榜 <列表> [页码] [期号]", "可用列表:"]
+        for field in VIDEO_LIST_FIELDS:
+            count = f"（{len(data.get_cards(field))} 条）" if data is not None else ""
+            lines.append(f"  {self.list_alias(field)} - {VIDEO_LIST_TITLES.get(field, field)}{count}")
+        return "\n".join(lines)
+
+    def prefetch_page(self, data: RankSnapshot, field: str, page: int) -> None:
+        """在后台渲染指定页（含封面），页码超出范围时忽略"""
+        key = (data.ranknum, field, page)
+        if page > self.page_count(data, field) or key in self._render_cache or self._render_flight.is_inflight(key):
+            return
+        task = asyncio.create_task(self.render_list(data, field, page))
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def close(self) -> None:
+        """取消仍在进行的预渲染，需在关闭连接池之前调用"""
+        tasks = list(self._prefetch_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # 预渲染通过 SingleFlight 以独立任务运行，取消调用方不会取消任务本身
+        await self._render_flight.cancel_all()
+
+    @staticmethod
+    def is_local_path(cover_path: str) -> bool:
+        """判断封面是本地路径还是 URL"""
+        return cover_path.startswith("/") or cover_path.startswith("C:") or cover_path.startswith("D:")
+
+    def render_video_content(self, video: VideoCard, rank: int, cover_path: str) -> List:
+        """根据已解析的封面路径构建单个视频的消息内容"""
         # 格式化播放量等数据
         play = video.play if video.play else 0
         coin = video.coin if video.coin else 0
@@ -48,11 +165,10 @@ class MessageBuilder:
             f"🔗 {video.url}"
         )
 
-        # 获取缓存的封面图片路径
-        cover_path = await self.cache_manager.get_cached_cover(video.coverurl)
-
-        # 判断是本地路径还是 URL
-        if cover_path.startswith("/") or cover_path.startswith("C:") or cover_path.startswith("D:"):
+        if not cover_path:
+            # 冷存储中的期不含封面，只发送文本
+            return [Comp.Plain(info_text)]
+        elif self.is_local_path(cover_path):
             # 本地文件路径
             image_comp = Comp.Image.fromFileSystem(cover_path)
         else:
@@ -64,35 +180,262 @@ class MessageBuilder:
             Comp.Plain(info_text)
         ]
 
-    async def build_forward_nodes(self, videos: List[VideoItem], bot_id: str, bot_name: str, rank_name: str) -> List:
-        """构建合并转发消息节点列表（异步）"""
-        nodes = []
-        
+    # ==================== 渲染缓存 ====================
+
+    async def render_list(self, data: RankSnapshot, field: str, page: int = 1) -> RenderedList:
+        """获取某期某个榜单某一页的渲染结果，首次请求时渲染并缓存
+
+        同一页的并发渲染会合并为一次
+        """
+        key = (data.ranknum, field, page)
+        rendered = self._render_cache.get(key)
+        if rendered is not None and rendered.complete and await self._covers_present(rendered):
+            self._render_cache.move_to_end(key)
+            metrics.inc("render_cache_hits_total")
+            return rendered
+        metrics.inc("render_cache_misses_total")
+        return await self._render_flight.do(key, lambda: self._render_list(data, field, page))
+
+    async def _covers_present(self, rendered: RenderedList) -> bool:
+        """渲染后封面缓存有过删除（淘汰、清理、缩略图重建）时，核对引用的本地封面是否仍然存在"""
+        generation = self.cache_manager.cover_generation
+        if rendered.generation == generation:
+            return True
+        paths = rendered.cover_paths
+        if not await asyncio.to_thread(lambda: all(os.path.exists(path) for path in paths)):
+            metrics.inc("render_cache_stale_total")
+            return False
+        rendered.generation = generation
+        return True
+
+    async def _render_list(self, data: RankSnapshot, field: str, page: int) -> RenderedList:
+        """渲染一页：只并发预取本页的封面，再逐个构建消息内容"""
+        start = time.perf_counter()
+        # 在获取封面之前记下代数，期间发生的删除会在下次复用时核对
+        generation = self.cache_manager.cover_generation
+        first_rank, videos = self._page_slice(data, field, page)
+        covers = await self.cache_manager.resolve_covers(video.coverurl for video in videos if video.coverurl)
+
+        items = []
+        cover_paths = []
+        complete = True
+        for idx, video in enumerate(videos, start=first_rank):
+            cover_path = covers.get(video.coverurl, video.coverurl)
+            if cover_path and self.is_local_path(cover_path):
+                cover_paths.append(cover_path)
+            else:
+                complete = complete and not cover_path
+            items.append(self.render_video_content(video, idx, cover_path))
+
+        header = f"📋 Vocaloid 周刊 - {self.get_rank_name(data, field)}\n\n{self._page_caption(data, field, page)}"
+        rendered = RenderedList(header, items, complete, cover_paths, generation)
+
+        key = (data.ranknum, field, page)
+        self._render_cache[key] = rendered
+        self._render_cache.move_to_end(key)
+        while len(self._render_cache) > RENDER_CACHE_SIZE:
+            self._render_cache.popitem(last=False)
+        metrics.observe("render_list_seconds", time.perf_counter() - start)
+        return rendered
+
+    def _page_caption(self, data: RankSnapshot, field: str, page: int) -> str:
+        """标题下方的分页说明，有下一页时提示翻页命令
+
+        命令中带上期号，往期与最新一期的提示都能直接使用，且不随最新期号变化而失效
+        """
+        pages = self.page_count(data, field)
+        if pages <= 1:
+            return f"以下是本期全部 {len(data.get_cards(field))} 条："
+        first_rank, videos = self._page_slice(data, field, page)
+        caption = f"以下是第 {first_rank}-{first_rank + len(videos) - 1} 名（第 {page}/{pages} 页）："
+        if page < pages:
+            caption += f"\n发送 /v榜 {self.list_alias(field)} {page + 1} {data.ranknum} 查看下一页"
+        return caption
+
+    @staticmethod
+    def _clone_chain(chain: List) -> List:
+        """复制预渲染的消息组件，避免发送过程中的修改影响缓存"""
+        return [copy.copy(comp) for comp in chain]
+
+    def build_forward_nodes(self, rendered: RenderedList, bot_id: str, bot_name: str) -> List:
+        """由渲染结果构建合并转发消息节点列表，只需填入 uin 与昵称"""
         # 将 bot_id 转换为整数（QQ号需要是整数类型）
         try:
             uin = int(bot_id)
         except (ValueError, TypeError):
             uin = 10000  # 默认值
 
-        # 添加榜单标题节点
-        header_node = Comp.Node(
-            uin=uin,
-            name=bot_name,
-            content=[Comp.Plain(f"📋 Vocaloid 周刊 - {rank_name}\n\n以下是本期 Top 10：")]
-        )
-        nodes.append(header_node)
-
-        # 添加每个视频的节点
-        for idx, video in enumerate(videos[:10], start=1):
-            content = await self.build_video_content(video, idx)
-            node = Comp.Node(
-                uin=uin,
-                name=bot_name,
-                content=content
+        # 榜单标题节点 + 每个视频的节点
+        with metrics.timer("build_forward_seconds"):
+            nodes = [Comp.Node(uin=uin, name=bot_name, content=[Comp.Plain(rendered.header)])]
+            for content in rendered.items:
+                nodes.append(Comp.Node(uin=uin, name=bot_name, content=self._clone_chain(content)))
+        return nodes
+
+    # ==================== 榜单长图 ====================
+
+    def use_board(self, use_forward: bool) -> bool:
+        """按输出模式判断是否发送榜单长图"""
+        if self.board_renderer is None or not self.board_renderer.available:
+            return False
+        return self.output_mode == "image" or (self.output_mode == "image_fallback" and not use_forward)
+
+    async def render_board(self, data: RankSnapshot, field: str, page: int = 1) -> Optional[str]:
+        """获取某期某个榜单某一页的长图路径，首次请求时绘制并缓存到磁盘，失败时返回 None"""
+        board_path = self.cache_manager.get_board_path(data.ranknum, field, page=page)
+        if await asyncio.to_thread(board_path.exists):
+            return str(board_path.absolute())
+        key = ("board", data.ranknum, field, page)
+        return await self._render_flight.do(key, lambda: self._render_board(data, field, page))
+
+    async def _render_board(self, data: RankSnapshot, field: str, page: int) -> Optional[str]:
+        """绘制长图：封面全部缓存到本地时写入正式路径，否则写入临时路径，下次请求重新绘制"""
+        first_rank, videos = self._page_slice(data, field, page)
+        covers = await self.cache_manager.resolve_covers(video.coverurl for video in videos if video.coverurl)
+
+        rows = []
+        complete = True
+        for idx, video in enumerate(videos, start=first_rank):
+            cover_path = covers.get(video.coverurl, "")
+            if cover_path and not self.is_local_path(cover_path):
+                complete = False
+                cover_path = ""
+            rows.append(BoardRow(
+                rank=idx,
+                title=video.title,
+                metrics=(
+                    f"▶ {self.format_num(video.play or 0)}  赞 {self.format_num(video.like or 0)}  "
+                    f"藏 {self.format_num(video.favorite or 0)}  币 {self.format_num(video.coin or 0)}  "
+                    f"得分 {self.format_num(video.point or 0)}"
+                ),
+                footer=video.url,
+                cover_path=cover_path,
+            ))
+
+        board_path = self.cache_manager.get_board_path(data.ranknum, field, complete, page)
+        title = f"Vocaloid 周刊 - {self.get_rank_name(data, field)}"
+        pages = self.page_count(data, field)
+        if pages > 1:
+            title += f" {page}/{pages}"
+        try:
+            with metrics.timer("render_board_seconds"):
+                await self.board_renderer.render(title, rows, board_path)
+        except Exception as e:
+            logger.warning(f"绘制榜单长图失败: {e}，改为发送多条消息")
+            return None
+        return str(board_path.absolute())
+
+    # ==================== 历史查询 ====================
+
+    def build_trajectory_text(self, history: IssueIndex, avid: str) -> str:
+        """构建视频跨期排名走势与播放增长文本"""
+        entries = history.trajectory(avid)
+        if not entries:
+            return f"❌ 在已缓存的 {len(history.issues)} 期中未找到 av{avid}"
+
+        growth = {ranknum: delta for ranknum, _, delta in history.play_growth(avid)}
+        lines = [f"📈 {history.title(avid)} (av{avid})", "━━━━━━━━━━━━"]
+        for entry in entries:
+            list_name = VIDEO_LIST_TITLES.get(entry.field, entry.field)
+            line = f"第{entry.ranknum}期 {list_name} #{entry.rank} ▶️ {self.format_num(entry.play)}"
+            # 同一期出现在多个榜单时只在第一条后标注增长
+            delta = growth.pop(entry.ranknum, None)
+            if delta is not None:
+                line += f" ({'+' if delta >= 0 else '-'}{self.format_num(abs(delta))})"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def build_super_hit_text(self, history: IssueIndex, limit: int = 10) -> str:
+        """构建 SuperHit 次数排行文本"""
+        rows = history.longest_super_hits(limit)
+        if not rows:
+            return "❌ 已缓存的数据中没有 SuperHit 记录"
+
+        lines = [f"🔥 SuperHit 次数排行（已缓存 {len(history.issues)} 期）", "━━━━━━━━━━━━"]
+        for idx, (avid, title, times, ranknum) in enumerate(rows, start=1):
+            lines.append(f"{idx}. {title} - {times} 次（最近: 第{ranknum}期, av{avid}）")
+        return "\n".join(lines)
+
+    def build_search_text(self, history: IssueIndex, keyword: str, avids: List[str], limit: int = 10) -> str:
+        """构建标题搜索结果文本，按最近出现的期号排序，并列出该期所在榜单"""
+        if not avids:
+            return f"❌ 在已缓存的 {len(history.issues)} 期中未找到标题包含「{keyword}」的视频"
+
+        results = []
+        for avid in avids:
+            entries = history.trajectory(avid)
+            if entries:
+                latest = max(entry.ranknum for entry in entries)
+                results.append((latest, avid, [entry for entry in entries if entry.ranknum == latest]))
+        results.sort(key=lambda item: item[0], reverse=True)
+
+        lines = [f"🔍 「{keyword}」共找到 {len(results)} 个视频", "━━━━━━━━━━━━"]
+        for latest, avid, entries in results[:limit]:
+            places = "、".join(
+                f"{VIDEO_LIST_TITLES.get(entry.field, entry.field)} #{entry.rank}" for entry in entries
             )
-            nodes.append(node)
+            lines.append(f"📺 {history.title(avid)} (av{avid})\n    第{latest}期: {places}")
+        if len(results) > limit:
+            lines.append(f"…… 另有 {len(results) - limit} 个结果，请尝试更精确的关键词")
+        return "\n".join(lines)
 
-        return nodes
+    def build_status_text(self) -> str:
+        """构建插件运行状态文本：请求、缓存命中与各环节耗时"""
+
+        def percent(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value * 100:.1f}%"
+
+        def gauge(name: str) -> int:
+            return int(metrics.gauge(name) or 0)
+
+        def breaker(name: str) -> str:
+            remaining = metrics.gauge(f"breaker_{name}_open_seconds")
+            return f"熔断中（{remaining:.0f} 秒后重试）" if remaining else "正常"
+
+        c = metrics.counter
+        uptime = int(time.time() - metrics.started_at)
+        lines = [
+            "📊 Vocaloid 周刊插件状态",
+            "━━━━━━━━━━━━",
+            f"运行时间: {uptime // 3600} 小时 {uptime % 3600 // 60} 分钟",
+            f"内存快照: 第{gauge('snapshot_ranknum')}期，上次确认 {gauge('snapshot_age_seconds')} 秒前，"
+            f"命中率 {percent(metrics.ratio('snapshot_hits_total', 'snapshot_misses_total'))}",
+            f"API: 请求 {c('api_requests_total'):g} 次，未修改 {c('api_not_modified_total'):g}，"
+            f"失败 {c('api_failures_total'):g}，降级 {c('api_fallbacks_total'):g}",
+            f"封面: 命中率 {percent(metrics.ratio('cover_cache_hits_total', 'cover_cache_misses_total'))}，"
+            f"已下载 {c('cover_bytes_downloaded_total') / 1024 / 1024:.1f} MB，"
+            f"失败 {c('cover_download_failures_total'):g}，超时未等到 {c('cover_deadline_misses_total'):g}",
+            f"渲染缓存: 命中率 {percent(metrics.ratio('render_cache_hits_total', 'render_cache_misses_total'))}，"
+            f"{gauge('render_cache_entries')} 条",
+            f"本地缓存: 热缓存 {gauge('hot_issues')} 期，冷存储 {gauge('archived_issues')} 期，"
+            f"封面 {gauge('cover_cache_files')} 张 / {gauge('cover_cache_bytes') / 1024 / 1024:.1f} MB",
+            f"熔断: API {breaker('api')}，封面 {breaker('cover')}；"
+            f"旧快照应答 {c('snapshot_stale_served_total'):g} 次",
+            f"回复: 合并转发 {c('replies_forward_total'):g}，多条消息 {c('replies_messages_total'):g}，"
+            f"长图 {c('replies_board_total'):g}",
+            "━━━━━━━━━━━━",
+            "耗时 (p50 / p95 / 次数):",
+        ]
+        for name, label in STATUS_LATENCY_LABELS.items():
+            histogram = metrics.histogram(name)
+            if histogram is None or not histogram.count:
+                continue
+            lines.append(
+                f"  {label}: ≤{histogram.quantile(0.5) * 1000:g}ms / ≤{histogram.quantile(0.95) * 1000:g}ms / {histogram.count}"
+            )
+        return "\n".join(lines)
+
+    async def warmup(self, data: RankSnapshot) -> None:
+        """新一期发布后预先缓存所有列表的封面并渲染可查询的榜单，使首次查询无需等待"""
+        urls = data.cover_urls()
+        cached = await self.cache_manager.warmup_covers(urls)
+        logger.info(f"第 {data.ranknum} 期封面预热完成: {cached}/{len(urls)}")
+
+        for field in RANK_LIST_TITLES:
+            await self.render_list(data, field)
+            if self.output_mode != "auto" and self.board_renderer is not None and self.board_renderer.available:
+                await self.render_board(data, field)
+        logger.info(f"第 {data.ranknum} 期榜单消息已预渲染")
 
     @staticmethod
     def is_forward_supported(event: AstrMessageEvent) -> bool:
@@ -108,29 +451,48 @@ class MessageBuilder:
             logger.warning(f"获取平台类型失败: {e}")
             return False
 
-    async def send_rank_result(self, event: AstrMessageEvent, videos: List[VideoItem], rank_name: str):
-        """发送榜单结果，根据平台选择合并转发或多条消息"""
+    async def send_rank_result(self, event: AstrMessageEvent, data: RankSnapshot, field: str, page: int = 1):
+        """发送榜单某一页，根据平台选择合并转发或多条消息；发送前在后台预取下一页"""
         use_forward = self.is_forward_supported(event)
-        logger.info(f"发送榜单: {rank_name}, 使用合并转发: {use_forward}")
-        
+        rank_name = self.get_rank_name(data, field)
+        logger.info(f"发送榜单: {rank_name} 第 {page} 页, 使用合并转发: {use_forward}")
+        # 从收到请求到第一条消息准备好的耗时，不含平台发送与限速等待
+        start = time.perf_counter()
+
+        if self.use_board(use_forward):
+            # 长图模式：一张图片代替逐条消息，绘制失败时回退
+            board_path = await self.render_board(data, field, page)
+            if board_path:
+                metrics.observe("reply_prepare_seconds", time.perf_counter() - start)
+                metrics.inc("replies_board_total")
+                yield event.chain_result([Comp.Image.fromFileSystem(board_path)])
+                return
+
+        rendered = await self.render_list(data, field, page)
+        # 翻页通常紧随其后，提前解析下一页的封面
+        self.prefetch_page(data, field, page + 1)
+
         if use_forward:
             # 支持合并转发的平台，使用 Nodes 包装所有 Node
             # 关键：必须使用 Nodes 包装多个 Node，否则每个 Node 会被单独发送
             bot_id = event.message_obj.self_id
             bot_name = "Vocaloid 周刊"
-            nodes = await self.build_forward_nodes(videos, bot_id, bot_name, rank_name)
+            nodes = self.build_forward_nodes(rendered, bot_id, bot_name)
             logger.info(f"构建了 {len(nodes)} 个转发节点，准备发送合并转发消息")
             # 使用 Nodes 包装所有 Node，一次性发送合并转发
             forward_nodes = Nodes(nodes)
+            metrics.observe("reply_prepare_seconds", time.perf_counter() - start)
+            metrics.inc("replies_forward_total")
             yield event.chain_result([forward_nodes])
         else:
-            # 不支持合并转发的平台，发送多条普通消息
-            # 先发送标题
-            yield event.plain_result(f"📋 Vocaloid 周刊 - {rank_name}\n\n以下是本期 Top 10：")
-
-            # 逐条发送每个视频
-            for idx, video in enumerate(videos[:10], start=1):
-                content = await self.build_video_content(video, idx)
-                yield event.chain_result(content)
-                # 添加短暂延迟避免触发平台限流
-                await asyncio.sleep(0.5)
+            # 不支持合并转发的平台，按平台允许的长度合并后分条发送，并按会话令牌桶限速
+            chains = self.send_scheduler.batch_chains(
+                event, rendered.header, [self._clone_chain(content) for content in rendered.items]
+            )
+            logger.info(f"分 {len(chains)} 条发送，限速 {self.send_scheduler.describe(event)}")
+            metrics.observe("reply_prepare_seconds", time.perf_counter() - start)
+            metrics.inc("replies_messages_total")
+            metrics.inc("messages_sent_total", len(chains))
+            for chain in chains:
+                await self.send_scheduler.acquire(event)
+                yield event.chain_result(chain)
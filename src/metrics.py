@@ -0,0 +1,154 @@
+"""
+指标模块 - 记录请求、缓存与渲染各环节的计数与耗时，供状态命令与 Prometheus 文本导出使用
+"""
+import asyncio
+import bisect
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from astrbot.api import logger
+
+from .utils import atomic_write_bytes
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = "vocaloid_"
+
+
+def _format_value(value: float) -> str:
+    """整数值按整数输出，避免科学计数法丢失精度"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Histogram:
+    """固定桶直方图，记录次数、总和与各桶计数"""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # 最后一个桶为 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数，返回所在桶的上界（落在 +Inf 桶时返回最大上界）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[min(idx, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+
+class Metrics:
+    """进程内指标注册表：计数器、直方图与按需求值的仪表"""
+
+    def __init__(self):
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """计数器加 value"""
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def counter(self, name: str) -> float:
+        """读取计数器"""
+        return self._counters.get(name, 0)
+
+    def observe(self, name: str, value: float) -> None:
+        """向直方图记录一个值"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram()
+        histogram.observe(value)
+
+    def histogram(self, name: str) -> Optional[Histogram]:
+        """读取直方图"""
+        return self._histograms.get(name)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """记录代码块耗时（秒），同步与异步代码中均可使用"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def register_gauge(self, name: str, func: Callable[[], float]) -> None:
+        """注册仪表，导出时调用 func 求值；同名注册会覆盖（插件重载时替换旧实例）"""
+        self._gauges[name] = func
+
+    def gauge(self, name: str) -> Optional[float]:
+        """读取仪表当前值，求值失败时返回 None"""
+        func = self._gauges.get(name)
+        if func is None:
+            return None
+        try:
+            return func()
+        except Exception:
+            return None
+
+    def ratio(self, hits: str, misses: str) -> Optional[float]:
+        """计算命中率，尚无数据时返回 None"""
+        total = self.counter(hits) + self.counter(misses)
+        return self.counter(hits) / total if total else None
+
+    def reset(self) -> None:
+        """清空计数器与直方图，保留已注册的仪表"""
+        self._counters.clear()
+        self._histograms.clear()
+        self.started_at = time.time()
+
+    def render_prometheus(self) -> str:
+        """以 Prometheus 文本格式导出所有指标"""
+        lines: List[str] = []
+        for name in sorted(self._counters):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+            lines.append(f"{METRIC_PREFIX}{name} {_format_value(self._counters[name])}")
+        for name in sorted(self._gauges):
+            value = self.gauge(name)
+            if value is None:
+                continue
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} gauge")
+            lines.append(f"{METRIC_PREFIX}{name} {_format_value(value)}")
+        for name in sorted(self._histograms):
+            histogram = self._histograms[name]
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{METRIC_PREFIX}{name}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC_PREFIX}{name}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{METRIC_PREFIX}{name}_sum {histogram.sum:.6f}")
+            lines.append(f"{METRIC_PREFIX}{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    async def dump_prometheus(self, path: Path) -> None:
+        """原子写入 Prometheus 文本文件，供 node_exporter textfile 等方式收集"""
+        content = self.render_prometheus().encode("utf-8")
+        try:
+            await asyncio.to_thread(atomic_write_bytes, path, content)
+        except Exception as e:
+            logger.warning(f"导出指标失败: {e}")
+
+
+# 全局指标注册表
+metrics = Metrics()
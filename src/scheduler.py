@@ -2,45 +2,113 @@
 定时任务模块 - 处理周榜的定时更新
 """
 import asyncio
+import time
 from datetime import datetime
-from typing import Optional, Callable, Awaitable
+from typing import Any, Optional, Callable, Awaitable
 
 from astrbot.api import logger
 
+from .constants import DEFAULT_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+from .utils import next_release_time
+
+# 单次休眠的上限（秒），长时间等待时分段休眠以便重新校准时间
+MAX_SLEEP_CHUNK = 6 * 60 * 60
+
 
 class SchedulerTask:
     """定时更新任务管理器"""
 
-    def __init__(self, fetch_callback: Callable[[], Awaitable]):
+    def __init__(
+        self,
+        fetch_callback: Callable[[], Awaitable],
+        current_callback: Callable[[], Any],
+        on_new_issue: Optional[Callable[[Any], Awaitable]] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+    ):
         """
         初始化定时任务管理器
         
         Args:
             fetch_callback: 用于获取周榜数据的回调函数
+            current_callback: 返回当前内存中周榜数据的回调函数
+            on_new_issue: 检测到新一期时调用的预热回调，参数为新一期数据
+            poll_interval: 到达预计发布时间后首次轮询的间隔（秒）
+            max_poll_interval: 轮询退避的最大间隔（秒）
         """
         self._fetch_callback = fetch_callback
+        self._current_callback = current_callback
+        self._on_new_issue = on_new_issue
+        self._poll_interval = poll_interval
+        self._max_poll_interval = max_poll_interval
         self._update_task: Optional[asyncio.Task] = None
+        self._last_ranknum: Optional[int] = None
+
+    async def _handle_new_issue(self, data: Any) -> None:
+        """记录新一期期号并执行预热流程"""
+        logger.info(f"检测到第 {data.ranknum} 期周榜，开始预热")
+        self._last_ranknum = data.ranknum
+        if self._on_new_issue is not None:
+            try:
+                await self._on_new_issue(data)
+            except Exception as e:
+                logger.error(f"周榜预热失败: {e}")
+
+    async def _refresh(self) -> bool:
+        """拉取最新数据，发现新一期时执行预热流程并返回 True"""
+        data = await self._fetch_callback()
+        if data is None or data.ranknum == self._last_ranknum:
+            return False
+        await self._handle_new_issue(data)
+        return True
+
+    def _seconds_until_release(self) -> float:
+        """根据当前数据计算距离下一期预计发布的秒数，无数据时返回 0"""
+        current = self._current_callback()
+        if current is None:
+            return 0.0
+        release_at = next_release_time(current.generate_timestamp, current.collect_end_time_timestamp)
+        if release_at is None:
+            return 0.0
+        return max(0.0, release_at - time.time())
+
+    async def _sleep_until_release(self) -> None:
+        """精确休眠到下一期预计发布时间"""
+        wait = self._seconds_until_release()
+        if wait <= 0:
+            return
+
+        release_at = datetime.fromtimestamp(time.time() + wait)
+        logger.info(f"下一期预计于 {release_at:%Y-%m-%d %H:%M} 发布，届时开始检查更新")
+        while wait > 0:
+            await asyncio.sleep(min(wait, MAX_SLEEP_CHUNK))
+            wait = self._seconds_until_release()
+
+    async def _poll_until_new_issue(self) -> None:
+        """按指数退避轮询，直到出现新一期"""
+        delay = self._poll_interval
+        while not await self._refresh():
+            logger.debug(f"新一期尚未发布，{delay:.0f}s 后再次检查")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_poll_interval)
 
     async def _update_loop(self) -> None:
-        """后台定时更新任务，每周六自动更新"""
+        """后台定时更新任务，按预计发布时间精确唤醒并轮询新一期"""
+        # 启动时对已有数据做一次预热（封面已在本地时几乎无开销）
+        current = self._current_callback()
+        if current is not None and self._last_ranknum is None:
+            await self._handle_new_issue(current)
+
         while True:
             try:
-                now = datetime.now()
-                # 周六 = weekday() == 5
-                if now.weekday() == 5:
-                    logger.info("周六定时更新周榜数据...")
-                    await self._fetch_callback()
-                    # 更新完成后等待到下周六（等待约7天）
-                    await asyncio.sleep(24 * 60 * 60)  # 等待1天后继续检查
-                else:
-                    # 非周六，每小时检查一次
-                    await asyncio.sleep(60 * 60)
+                await self._sleep_until_release()
+                await self._poll_until_new_issue()
             except asyncio.CancelledError:
                 logger.info("定时更新任务已取消")
                 break
             except Exception as e:
                 logger.error(f"定时更新任务异常: {e}")
-                await asyncio.sleep(60 * 60)
+                await asyncio.sleep(self._poll_interval)
 
     def start(self) -> None:
         """启动定时更新任务"""
@@ -0,0 +1,136 @@
+"""
+标题搜索模块 - 基于 n-gram 倒排索引的视频标题全文搜索
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Set
+
+from .history import normalize_avid
+
+# 非文字字符（标点、符号、空白）作为分隔符
+_SEPARATOR_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """NFKC 规范化并忽略大小写，统一全角/半角与大小写差异"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def tokenize(text: str) -> Set[str]:
+    """将文本切分为字符 unigram + bigram
+
+    中日文标题没有空格分词，按字符 n-gram 建索引可以匹配任意子串；
+    标点与空白作为分隔符，n-gram 不跨越分隔符
+    """
+    tokens: Set[str] = set()
+    for segment in _SEPARATOR_RE.split(normalize_text(text)):
+        tokens.update(segment)
+        tokens.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return tokens
+
+
+def _query_tokens(query: str) -> Set[str]:
+    """查询词只用 bigram 过滤（单字查询退化为 unigram）"""
+    tokens: Set[str] = set()
+    for segment in _SEPARATOR_RE.split(normalize_text(query)):
+        if len(segment) == 1:
+            tokens.add(segment)
+        else:
+            tokens.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return tokens
+
+
+class TitleSearchIndex:
+    """视频标题倒排索引：n-gram -> {avid}
+
+    与 IssueIndex 一样由 CacheManager 维护：首次查询时全量构建，之后随保存/淘汰增量更新。
+    候选集通过倒排表求交得到，再以规范化标题做子串校验，查询代价与历史期数无关
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._titles: Dict[str, str] = {}
+        # avid -> 出现过的期号；某视频的所有期都被淘汰后才从索引移除
+        self._doc_issues: Dict[str, Set[int]] = {}
+        self._issue_docs: Dict[int, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    # ==================== 增量维护 ====================
+
+    def add_issue(self, ranknum: int, videos: Iterable[dict]) -> None:
+        """索引一期中所有列表的视频标题"""
+        if ranknum in self._issue_docs:
+            self.remove_issue(ranknum)
+        docs = self._issue_docs[ranknum] = set()
+
+        for video in videos:
+            avid = video.get("avid")
+            title = video.get("title")
+            if avid is None or not title:
+                continue
+            avid = normalize_avid(avid)
+            docs.add(avid)
+            self._doc_issues.setdefault(avid, set()).add(ranknum)
+
+            normalized = normalize_text(title)
+            previous = self._titles.get(avid)
+            if previous == normalized:
+                continue
+            if previous is not None:
+                # 标题有变化时以最新一次为准
+                self._unindex(avid, previous)
+            self._titles[avid] = normalized
+            for token in tokenize(title):
+                self._postings.setdefault(token, set()).add(avid)
+
+    def remove_issue(self, ranknum: int) -> None:
+        """移除一期，不再出现于任何已索引期的视频随之移出索引"""
+        for avid in self._issue_docs.pop(ranknum, ()):
+            issues = self._doc_issues.get(avid)
+            if issues is None:
+                continue
+            issues.discard(ranknum)
+            if not issues:
+                del self._doc_issues[avid]
+                title = self._titles.pop(avid, None)
+                if title is not None:
+                    self._unindex(avid, title)
+
+    def _unindex(self, avid: str, normalized_title: str) -> None:
+        """从倒排表中删除某视频的所有 token"""
+        for token in tokenize(normalized_title):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(avid)
+            if not postings:
+                del self._postings[token]
+
+    # ==================== 查询 ====================
+
+    def search(self, query: str) -> List[str]:
+        """返回标题包含查询词的 avid 列表（忽略大小写与全半角差异）"""
+        tokens = _query_tokens(query)
+        if not tokens:
+            return []
+
+        postings = []
+        for token in tokens:
+            docs = self._postings.get(token)
+            if not docs:
+                return []
+            postings.append(docs)
+
+        # 从最短的倒排表开始求交
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for docs in postings[1:]:
+            candidates &= docs
+            if not candidates:
+                return []
+
+        # n-gram 只能保证候选包含所有片段，最终以子串校验每个片段
+        segments = [segment for segment in _SEPARATOR_RE.split(normalize_text(query)) if segment]
+        return [avid for avid in candidates if all(segment in self._titles[avid] for segment in segments)]
@@ -0,0 +1,166 @@
+"""
+发送调度模块 - 按平台与会话的令牌桶限速发送多条消息
+"""
+import asyncio
+import time
+from typing import Dict, Hashable, List, NamedTuple, Optional
+
+import astrbot.api.message_components as Comp
+from astrbot.api.event import AstrMessageEvent
+
+from .constants import PLATFORM_SEND_LIMITS, DEFAULT_SEND_LIMIT, SEND_BUCKET_IDLE_TTL
+from .metrics import metrics
+
+
+class SendLimit(NamedTuple):
+    """平台发送限制"""
+    # 单个会话每秒可发送的消息数
+    rate: float
+    # 单个会话允许的突发条数
+    burst: int
+    # 整个平台每秒可发送的消息数（0 表示不限）
+    platform_rate: float
+    # 单条消息链最多合并的视频条目数
+    batch_size: int
+
+
+class TokenBucket:
+    """令牌桶，按 rate 匀速补充、最多积攒 burst 个令牌"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        # 同一个桶的等待者按先来后到排队
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """取走一个令牌，令牌不足时等待补充"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill(time.monotonic())
+            self._tokens -= 1
+
+    def idle_since(self, now: float) -> bool:
+        """桶已补满且无人等待，可安全回收"""
+        if self._lock.locked():
+            return False
+        self._refill(now)
+        return self._tokens >= self.burst
+
+
+class SendScheduler:
+    """按平台与会话限速的发送调度器
+
+    每个会话一个令牌桶，不同会话互不阻塞；同一平台的所有会话再共享一个平台级令牌桶
+    """
+
+    def __init__(self, rate: float = 0, burst: int = 0, batch_size: int = 0):
+        # 配置中大于 0 的值覆盖各平台的默认限制
+        self._override_rate = rate
+        self._override_burst = burst
+        self._override_batch = batch_size
+        self._session_buckets: Dict[Hashable, TokenBucket] = {}
+        self._platform_buckets: Dict[str, TokenBucket] = {}
+        self._last_prune = time.monotonic()
+
+    @staticmethod
+    def get_platform_name(event: AstrMessageEvent) -> str:
+        """获取事件所属平台名，失败时返回空字符串"""
+        try:
+            return event.get_platform_name()
+        except Exception:
+            return ""
+
+    def get_limit(self, platform: str) -> SendLimit:
+        """获取平台的发送限制，叠加配置中的覆盖值"""
+        limit = PLATFORM_SEND_LIMITS.get(platform, DEFAULT_SEND_LIMIT)
+        return SendLimit(
+            rate=self._override_rate or limit[0],
+            burst=self._override_burst or limit[1],
+            platform_rate=limit[2],
+            batch_size=self._override_batch or limit[3],
+        )
+
+    def _prune(self, now: float) -> None:
+        """回收长时间空闲的会话令牌桶，避免会话数无限增长"""
+        if now - self._last_prune < SEND_BUCKET_IDLE_TTL:
+            return
+        self._last_prune = now
+        for key, bucket in list(self._session_buckets.items()):
+            if bucket.idle_since(now):
+                del self._session_buckets[key]
+
+    async def acquire(self, event: AstrMessageEvent) -> None:
+        """等待到当前会话与平台均允许再发送一条消息"""
+        platform = self.get_platform_name(event)
+        limit = self.get_limit(platform)
+        start = time.monotonic()
+        self._prune(start)
+
+        key = (platform, event.unified_msg_origin)
+        bucket = self._session_buckets.get(key)
+        if bucket is None:
+            bucket = self._session_buckets[key] = TokenBucket(limit.rate, limit.burst)
+        await bucket.acquire()
+
+        if limit.platform_rate > 0:
+            platform_bucket = self._platform_buckets.get(platform)
+            if platform_bucket is None:
+                platform_bucket = TokenBucket(limit.platform_rate, max(1, int(limit.platform_rate)))
+                self._platform_buckets[platform] = platform_bucket
+            await platform_bucket.acquire()
+        metrics.observe("send_throttle_seconds", time.monotonic() - start)
+
+    def batch_chains(self, event: AstrMessageEvent, header: str, items: List[List]) -> List[List]:
+        """按平台允许的消息链长度合并标题与视频条目
+
+        相邻的纯文本组件合并为一段，减少消息条数；标题并入第一条消息
+        """
+        batch_size = max(1, self.get_limit(self.get_platform_name(event)).batch_size)
+        chains: List[List] = []
+        for start in range(0, len(items), batch_size):
+            chain: List = []
+            if start == 0:
+                chain.append(Comp.Plain(header))
+            for item in items[start:start + batch_size]:
+                chain.extend(item)
+            chains.append(self._merge_plain(chain))
+        if not chains:
+            chains.append([Comp.Plain(header)])
+        return chains
+
+    @staticmethod
+    def _merge_plain(chain: List) -> List:
+        """合并相邻的纯文本组件，段落之间空一行"""
+        merged: List = []
+        pending: Optional[List[str]] = None
+        for comp in chain:
+            if isinstance(comp, Comp.Plain):
+                if pending is None:
+                    pending = []
+                pending.append(comp.text)
+                continue
+            if pending is not None:
+                merged.append(Comp.Plain("\n\n".join(pending)))
+                pending = None
+            merged.append(comp)
+        if pending is not None:
+            merged.append(Comp.Plain("\n\n".join(pending)))
+        return merged
+
+    def describe(self, event: AstrMessageEvent) -> str:
+        """当前平台限制的简要描述，用于日志"""
+        platform = self.get_platform_name(event)
+        limit = self.get_limit(platform)
+        return f"{platform or 'unknown'} rate={limit.rate}/s burst={limit.burst} batch={limit.batch_size}"
+
@@ -0,0 +1,44 @@
+"""
+请求合并模块 - 同一资源同一时刻只发起一次请求，其余调用共享结果
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按 key 合并并发请求的在途任务表"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """执行 func，若相同 key 的任务仍在进行中则直接等待其结果
+
+        任务以独立 Task 运行并通过 shield 等待，单个调用方被取消不会影响其他等待者
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._on_done(key, f))
+        return await asyncio.shield(future)
+
+    def _on_done(self, key: Hashable, future: asyncio.Future) -> None:
+        """任务结束后移出在途表，并消费异常避免未处理警告"""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()
+
+    async def cancel_all(self) -> None:
+        """取消所有在途任务并等待其结束"""
+        futures = list(self._inflight.values())
+        for future in futures:
+            future.cancel()
+        await asyncio.gather(*futures, return_exceptions=True)
+
+    def is_inflight(self, key: Hashable) -> bool:
+        """检查指定 key 是否有在途任务"""
+        return key in self._inflight
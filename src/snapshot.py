@@ -0,0 +1,89 @@
+"""
+快照格式模块 - 周榜缓存的紧凑二进制格式，支持按列表单独解码
+
+文件布局::
+
+    MAGIC (4 字节) | 头部长度 (4 字节，大端) | 头部 JSON | 各列表数据块
+
+头部包含除视频列表外的所有字段（meta）以及每个列表数据块的 [偏移, 长度]，
+偏移相对于数据块区域的起点。读取单个列表时只需读取头部并定位到对应数据块。
+"""
+import json
+import struct
+from pathlib import Path
+from typing import Dict, List
+
+from .constants import VIDEO_LIST_FIELDS
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库
+    orjson = None
+
+SNAPSHOT_MAGIC = b"VRS1"
+SNAPSHOT_SUFFIX = ".vrs"
+_HEADER_STRUCT = struct.Struct(">I")
+
+
+def encode_json(obj) -> bytes:
+    """紧凑序列化为 UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(raw: bytes):
+    """反序列化 JSON"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def encode_snapshot(data: dict) -> bytes:
+    """将周榜原始数据编码为快照格式"""
+    meta = {key: value for key, value in data.items() if key not in VIDEO_LIST_FIELDS}
+    blobs = []
+    lists: Dict[str, List[int]] = {}
+    offset = 0
+    for field in VIDEO_LIST_FIELDS:
+        blob = encode_json(data.get(field, []))
+        lists[field] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = encode_json({"meta": meta, "lists": lists})
+    return b"".join([SNAPSHOT_MAGIC, _HEADER_STRUCT.pack(len(header)), header, *blobs])
+
+
+class SnapshotReader:
+    """快照读取器，打开时只解析头部，列表按需读取"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(f"不是有效的周榜快照文件: {path.name}")
+            (header_len,) = _HEADER_STRUCT.unpack(f.read(_HEADER_STRUCT.size))
+            header = decode_json(f.read(header_len))
+        self.meta: dict = header["meta"]
+        self._lists: Dict[str, List[int]] = header["lists"]
+        self._data_start = len(SNAPSHOT_MAGIC) + _HEADER_STRUCT.size + header_len
+
+    def read_raw_lists(self) -> Dict[str, bytes]:
+        """读取所有列表的原始字节但不解码，解码推迟到首次访问"""
+        raw_lists = {}
+        with open(self.path, "rb") as f:
+            f.seek(self._data_start)
+            blob = f.read()
+        for name, (offset, length) in self._lists.items():
+            raw_lists[name] = blob[offset:offset + length]
+        return raw_lists
+
+    def read_all(self) -> dict:
+        """读取完整数据，还原为与 latest.json 相同结构的字典"""
+        data = dict(self.meta)
+        with open(self.path, "rb") as f:
+            for name, (offset, length) in self._lists.items():
+                f.seek(self._data_start + offset)
+                data[name] = decode_json(f.read(length))
+        return data
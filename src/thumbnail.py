@@ -0,0 +1,100 @@
+"""
+缩略图模块 - 将封面缩放并重新编码为体积受限的缩略图，减小发送的消息体积
+"""
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from astrbot.api import logger
+
+from .utils import atomic_write_bytes
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 为可选依赖，缺失时直接发送原图
+    Image = None
+
+# 缩略图文件名标记：{md5}.thumb.{ext}，与原图存放在同一目录
+THUMB_MARKER = ".thumb."
+
+# 支持的缩略图格式 -> (Pillow 格式名, 扩展名)
+THUMB_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+    "jpg": ("JPEG", "jpg"),
+}
+
+
+def is_thumbnail(name: str) -> bool:
+    """判断文件名是否为缩略图"""
+    return THUMB_MARKER in name
+
+
+def thumbnail_owner_stem(name: str) -> str:
+    """获取缩略图对应原图的文件名主干（MD5）"""
+    return name.split(THUMB_MARKER, 1)[0]
+
+
+def encode_thumbnail(src: Path, max_edge: int, quality: int, fmt: str) -> bytes:
+    """读取原图并缩放到最长边不超过 max_edge，按指定格式与质量重新编码（在工作线程中执行）"""
+    pil_format = THUMB_FORMATS[fmt][0]
+    with Image.open(src) as img:
+        img.draft("RGB", (max_edge, max_edge))
+        if pil_format == "JPEG" or img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format=pil_format, quality=quality, optimize=pil_format == "JPEG", method=4)
+        return buffer.getvalue()
+
+
+class ThumbnailPipeline:
+    """缩略图生成流水线，在独立线程池中执行解码与编码，不阻塞事件循环"""
+
+    def __init__(self, enabled: bool, max_edge: int, quality: int, fmt: str, workers: int):
+        fmt = fmt.lower()
+        if fmt not in THUMB_FORMATS:
+            logger.warning(f"不支持的缩略图格式 {fmt}，使用 jpeg")
+            fmt = "jpeg"
+        if enabled and Image is None:
+            logger.info("未安装 Pillow，封面将以原图发送")
+        self.enabled = enabled and Image is not None
+        self.max_edge = max(16, max_edge)
+        self.quality = min(100, max(1, quality))
+        self.format = fmt
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def spec(self) -> str:
+        """当前缩略图参数，参数变化后旧缩略图会被重新生成"""
+        return f"{self.format}-{self.max_edge}-{self.quality}"
+
+    def thumbnail_name(self, cover_name: str) -> str:
+        """根据原图文件名生成缩略图文件名"""
+        return f"{Path(cover_name).stem}{THUMB_MARKER}{THUMB_FORMATS[self.format][1]}"
+
+    async def render(self, src: Path, dst: Path) -> int:
+        """生成缩略图并原子写入 dst，返回缩略图字节数
+
+        缩略图不比原图小时不写入并返回 0，调用方继续使用原图
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vocaloid-thumb")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._render_sync, src, dst)
+
+    def _render_sync(self, src: Path, dst: Path) -> int:
+        content = encode_thumbnail(src, self.max_edge, self.quality, self.format)
+        if len(content) >= src.stat().st_size:
+            return 0
+        atomic_write_bytes(dst, content)
+        return len(content)
+
+    def close(self) -> None:
+        """关闭线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,6 +1,9 @@
 from typing import List, Optional, Union, Dict, Any
 from pydantic import BaseModel, Field
 
+from .constants import VIDEO_LIST_FIELDS
+from .snapshot import decode_json
+
 # 1. 定义引用数据/基础数据指标 (referSource)
 # 这些字段在 referSource 和 视频主对象中都存在
 class VideoMetrics(BaseModel):
@@ -106,4 +109,155 @@ class RankResponse(BaseModel):
     op: List[VideoItem]
     
     statistic: Statistic
-    thanks_list: List[Any] # 示例中为空，暂定为 Any
\ No newline at end of file
+    thanks_list: List[Any] # 示例中为空，暂定为 Any
+
+
+# 6. 消息热路径使用的精简视频投影，只保留展示所需字段
+class VideoCard:
+    __slots__ = ("avid", "title", "url", "coverurl", "play", "like", "favorite", "coin", "point")
+
+    def __init__(
+        self,
+        avid: str,
+        title: str,
+        url: str,
+        coverurl: str,
+        play: Optional[int] = None,
+        like: Optional[int] = None,
+        favorite: Optional[int] = None,
+        coin: Optional[int] = None,
+        point: Optional[int] = None,
+    ):
+        self.avid = avid
+        self.title = title
+        self.url = url
+        self.coverurl = coverurl
+        self.play = play
+        self.like = like
+        self.favorite = favorite
+        self.coin = coin
+        self.point = point
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VideoCard":
+        """直接从原始字典构建，不经过模型校验"""
+        return cls(
+            str(data.get("avid", "")),
+            data.get("title", ""),
+            data.get("url", ""),
+            data.get("coverurl", ""),
+            data.get("play"),
+            data.get("like"),
+            data.get("favorite"),
+            data.get("coin"),
+            data.get("point"),
+        )
+
+
+# 7. 惰性周榜视图：元数据立即可用，各视频列表首次访问时才解码并转换为模型
+class RankSnapshot:
+    __slots__ = ("meta", "trusted", "_raw", "_lists", "_cards", "_statistic")
+
+    def __init__(self, meta: Dict[str, Any], raw_lists: Dict[str, Union[bytes, list]], trusted: bool = False):
+        """
+        Args:
+            meta: 除视频列表外的所有字段
+            raw_lists: 按原始字段名存放的列表，可以是已解码的 list 或未解码的 JSON 字节
+            trusted: 数据来自插件自己写入的缓存时为 True，使用 model_construct 跳过校验
+        """
+        if not isinstance(meta.get("ranknum"), int):
+            raise ValueError("周榜数据缺少有效的 ranknum 字段")
+        self.meta = meta
+        self.trusted = trusted
+        self._raw = raw_lists
+        self._lists: Dict[str, List[VideoItem]] = {}
+        self._cards: Dict[str, List[VideoCard]] = {}
+        self._statistic: Optional[Statistic] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], trusted: bool = False) -> "RankSnapshot":
+        """从 latest.json 结构的字典构建"""
+        meta = {key: value for key, value in data.items() if key not in VIDEO_LIST_FIELDS}
+        raw_lists = {field: data.get(field, []) for field in VIDEO_LIST_FIELDS}
+        return cls(meta, raw_lists, trusted)
+
+    # ---------- 元数据 ----------
+
+    @property
+    def ranknum(self) -> int:
+        return self.meta["ranknum"]
+
+    @property
+    def generate_timestamp(self) -> Optional[int]:
+        return self.meta.get("generate_timestamp")
+
+    @property
+    def collect_end_time_timestamp(self) -> Optional[int]:
+        return self.meta.get("collect_end_time_timestamp")
+
+    @property
+    def statistic(self) -> Statistic:
+        if self._statistic is None:
+            self._statistic = Statistic.model_validate(self.meta["statistic"])
+        return self._statistic
+
+    def __getattr__(self, name: str):
+        # 兼容 RankResponse 的属性访问，如 data.main_rank / data.history_1_year / data.pubdate
+        if name.startswith("_") or name in RankSnapshot.__slots__:
+            raise AttributeError(name)
+        field = name.replace("_", "-") if name.startswith("history_") else name
+        if field in VIDEO_LIST_FIELDS:
+            return self.get_list(field)
+        try:
+            return self.meta[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    # ---------- 视频列表 ----------
+
+    def _raw_list(self, field: str) -> list:
+        """解码原始列表（仅首次访问时解析 JSON 字节）"""
+        raw = self._raw.get(field, [])
+        if isinstance(raw, (bytes, bytearray)):
+            raw = decode_json(raw)
+            self._raw[field] = raw
+        return raw
+
+    def get_list(self, field: str) -> List[VideoItem]:
+        """获取完整的视频模型列表，首次访问时转换"""
+        videos = self._lists.get(field)
+        if videos is None:
+            raw = self._raw_list(field)
+            if self.trusted:
+                videos = [VideoItem.model_construct(**item) for item in raw]
+            else:
+                videos = [VideoItem.model_validate(item) for item in raw]
+            self._lists[field] = videos
+        return videos
+
+    def validate(self) -> None:
+        """完整校验统计信息与所有视频列表，校验失败抛出 ValidationError（ValueError 的子类）"""
+        self.statistic
+        for field in VIDEO_LIST_FIELDS:
+            self.get_list(field)
+
+    def get_cards(self, field: str) -> List[VideoCard]:
+        """获取消息展示用的精简投影列表"""
+        cards = self._cards.get(field)
+        if cards is None:
+            if not self.trusted:
+                # 来自网络的数据先完成一次校验
+                self.get_list(field)
+            cards = [VideoCard.from_dict(item) for item in self._raw_list(field)]
+            self._cards[field] = cards
+        return cards
+
+    def cover_urls(self) -> List[str]:
+        """返回本期所有列表引用的封面 URL（去重，保持出现顺序），不触发模型转换"""
+        urls = dict.fromkeys(
+            item["coverurl"]
+            for field in VIDEO_LIST_FIELDS
+            for item in self._raw_list(field)
+            if isinstance(item, dict) and "coverurl" in item
+        )
+        return list(urls)
@@ -0,0 +1,41 @@
+"""
+工具函数模块
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from .constants import RELEASE_INTERVAL
+
+
+def to_seconds(timestamp: Optional[int]) -> Optional[float]:
+    """将时间戳统一转换为秒（兼容毫秒时间戳）"""
+    if not timestamp:
+        return None
+    if timestamp > 10 ** 12:
+        return timestamp / 1000
+    return float(timestamp)
+
+
+def next_release_time(generate_timestamp: Optional[int], collect_end_timestamp: Optional[int]) -> Optional[float]:
+    """根据本期的生成/截止时间推算下一期的预计发布时间（秒级时间戳）"""
+    anchor = to_seconds(generate_timestamp) or to_seconds(collect_end_timestamp)
+    if anchor is None:
+        return None
+    return anchor + RELEASE_INTERVAL
+
+
+def atomic_write_bytes(path: Path, content: bytes) -> None:
+    """原子写入文件：先写同目录临时文件再替换，读者不会看到写了一半的内容"""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise